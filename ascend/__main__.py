@@ -1,4 +1,4 @@
-from wasabi2d import Scene, run, event
+from ascend.engine import Scene, run, event
 from ascend import game
 import pygame
 
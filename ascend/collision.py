@@ -1,5 +1,8 @@
+from math import sqrt
+
+import numpy as np
+
 from .vector2d import Vector2D, Polar2D
-from .triangle_intersect import polygon_collision
 
 def entity_collision(
     entity1,
@@ -32,3 +35,109 @@ def circle_rect_collision(
 
     delta = circle_pos - Vector2D(x, y)
     return delta.magnitude_squared <= circle_radius_squared
+
+
+def segment_circles_collision(start, along, centers, radii):
+    """Test one line segment against many circles at once.
+
+    The segment runs from start to start + along.  centers is an
+    (N, 2) array and radii an (N,) array or a scalar.  Returns an (N,)
+    boolean mask of the circles the segment crosses: those where the
+    segment's line meets the circle at a point between its ends.
+    """
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    P1 = np.asarray(start, dtype=float)
+    V = np.asarray(along, dtype=float)
+    rel = P1 - centers
+    r = np.asarray(radii, dtype=float)
+
+    a = V @ V
+    b = 2 * (rel @ V)
+    c = np.sum(rel * rel, axis=1) - r * r
+    disc = b * b - 4 * a * c
+    hit = disc >= 0
+    sqrt_disc = np.sqrt(np.where(hit, disc, 0))
+    t1 = (-b + sqrt_disc) / (2 * a)
+    t2 = (-b - sqrt_disc) / (2 * a)
+    return hit & (((0 <= t1) & (t1 <= 1)) | ((0 <= t2) & (t2 <= 1)))
+
+
+def separate_entities(entities, cell_size=None):
+    """Push overlapping entities apart.
+
+    See separate_circles(); this is the same thing for a list of
+    objects with pos and radius attributes.
+    """
+    entities = list(entities)
+    positions = [[e.pos[0], e.pos[1]] for e in entities]
+    radii = [e.radius for e in entities]
+    for i in separate_circles(positions, radii, cell_size):
+        entities[i].pos = Vector2D(*positions[i])
+
+
+def separate_circles(positions, radii, cell_size=None):
+    """Push overlapping circles apart.
+
+    positions is a list of [x, y] lists, which are updated in place;
+    radii is a list of radii.  Returns the set of indices that moved.
+
+    Circles are bucketed into a uniform grid and only pairs from
+    neighbouring cells are tested.  Pairs are visited in the same order
+    as a plain nested loop over the list (i < j), so the result is the
+    same as testing every pair--including the quirk that a circle's
+    own position is recomputed from where it was when its turn came up.
+
+    cell_size defaults to the largest diameter in the list, which is
+    the largest distance at which two circles can overlap.
+    """
+    count = len(positions)
+    moved = set()
+    if count < 2:
+        return moved
+
+    if cell_size is None:
+        cell_size = 2 * max(radii)
+
+    grid = {}
+    cells = []
+    for i, (x, y) in enumerate(positions):
+        cell = (int(x // cell_size), int(y // cell_size))
+        cells.append(cell)
+        grid.setdefault(cell, []).append(i)
+
+    for i in range(count):
+        cx, cy = cells[i]
+        neighbours = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                bucket = grid.get((cx + dx, cy + dy))
+                if bucket:
+                    neighbours.extend(j for j in bucket if j > i)
+        if not neighbours:
+            continue
+        neighbours.sort()
+
+        x1, y1 = positions[i]
+        r1 = radii[i]
+        for j in neighbours:
+            r2 = radii[j]
+            r = r1 + r2
+            x2, y2 = positions[j]
+            sx = x2 - x1
+            sy = y2 - y1
+            if sx * sx + sy * sy < r * r:
+                mag = sqrt(sx * sx + sy * sy)
+                overlap = r - mag
+                if mag:
+                    sx /= mag
+                    sy /= mag
+                else:
+                    sx = 0
+                    sy = 1
+                frac = (r1 * r1) / (r1 * r1 + r2 * r2)
+                push1 = 1.0 - frac
+                positions[i] = [x1 - sx * overlap * push1, y1 - sy * overlap * push1]
+                positions[j] = [x2 + sx * overlap * frac, y2 + sy * overlap * frac]
+                moved.add(i)
+                moved.add(j)
+    return moved
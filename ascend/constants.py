@@ -1,6 +1,10 @@
 import enum
 
 
+# Enemy speeds are in pixels per frame at this many frames per second;
+# multiply by dt * SPEED_FPS to get pixels per simulation step.
+SPEED_FPS = 60
+
 class CollisionType(enum.IntEnum):
     NONE = 0
     WALL = 1
@@ -1,8 +1,7 @@
 from typing import Any
 from dataclasses import dataclass
 
-from wasabi2d import keys
-from wasabi2d.keyboard import keyboard
+from .engine import keys, keyboard
 from pygame import joystick
 
 from .vector2d import Vector2D, Polar2D
@@ -63,11 +62,77 @@ stick = None
 use_left_stick = use_hat = False
 
 
-def button_press():
-    if stick:
-        return stick.get_button(0)
-    else:
-        return keyboard.space
+# Every key the simulation reads.  Inputs can only answer for these.
+RECORDED_KEYS = (
+    keys.W, keys.A, keys.S, keys.D,
+    keys.UP, keys.DOWN, keys.LEFT, keys.RIGHT,
+    keys.SPACE, keys.K_1,
+)
+KEY_BITS = {key: 1 << bit for bit, key in enumerate(RECORDED_KEYS)}
+
+# joystick buttons 0 to NUM_BUTTONS - 1 are read
+NUM_BUTTONS = 4
+
+
+@dataclass(frozen=True)
+class Inputs:
+    """Everything the player is doing to the controls, for one frame.
+
+    The simulation reads input only from one of these, never from the
+    keyboard or joystick directly, so a frame's Inputs can be saved and
+    fed back in later to get the very same frame (see recording.py).
+
+    Look up keys like the keyboard: inputs.space, inputs[keys.W].
+    pressed and buttons are bitmasks, of RECORDED_KEYS and of joystick
+    buttons.  hat and axes are None unless the joystick's hat and left
+    stick are in use.
+    """
+    pressed: int = 0
+    buttons: int = 0
+    stick: bool = False
+    hat: Any = None
+    axes: Any = None
+
+    def __getitem__(self, key):
+        return bool(self.pressed & KEY_BITS[key])
+
+    def __getattr__(self, name):
+        try:
+            key = keys[name.upper()]
+        except KeyError:
+            raise AttributeError(name) from None
+        return self[key]
+
+    def button(self, n):
+        return bool(self.buttons & (1 << n))
+
+    def button_press(self):
+        if self.stick:
+            return self.button(0)
+        else:
+            return self.space
+
+
+def read_inputs(keyboard):
+    """Read the keyboard and joystick into an Inputs."""
+    pressed = 0
+    for key, bit in KEY_BITS.items():
+        if keyboard[key]:
+            pressed |= bit
+    if not stick:
+        return Inputs(pressed)
+
+    buttons = 0
+    for n in range(min(NUM_BUTTONS, stick.get_numbuttons())):
+        if stick.get_button(n):
+            buttons |= 1 << n
+    return Inputs(
+        pressed,
+        buttons,
+        stick=True,
+        hat=stick.get_hat(0) if use_hat else None,
+        axes=(stick.get_axis(0), stick.get_axis(1)) if use_left_stick else None,
+    )
 
 
 def init_controls(settings):
@@ -0,0 +1,148 @@
+import numpy as np
+
+from .vector2d import Vector2D
+
+
+class EnemyStore:
+    """Structure-of-arrays storage for a level's enemies.
+
+    Each enemy owns one row.  pos, prev_pos, spot_offset and knockback
+    are (capacity, 2) arrays; radius, speed and think_dt are float
+    arrays; head_to_spot, steers_to_spot, alive and think_due are bool
+    arrays; phase is an int array.  Only the
+    first count rows are in use, and entities[row] is the enemy that
+    owns each one.
+
+    prev_pos is where each enemy was at the start of the current
+    simulation step, for drawing in between steps.  It's NaN for
+    enemies added since.
+
+    think_due, think_dt and phase are for the level of detail: whether
+    the enemy updates this step, the time it's owed from steps it sat
+    out, and which steps it updates on (see lod.py).  New enemies
+    update straight away.
+
+    Enemies read and write their fields through properties
+    (see Entity in mobs.py), so a BadGuy is a thin view onto its row.
+    Level code can work on whole columns at once.
+
+    remove() swap-removes: the last row moves into the hole, so rows
+    are stable only until the next removal.  Always go through
+    entity.row rather than holding onto row numbers.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.entities = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, 'pos', None)
+        columns = {
+            'pos': np.zeros((capacity, 2)),
+            'prev_pos': np.zeros((capacity, 2)),
+            'spot_offset': np.zeros((capacity, 2)),
+            'knockback': np.zeros((capacity, 2)),
+            'radius': np.zeros(capacity),
+            'speed': np.zeros(capacity),
+            'head_to_spot': np.zeros(capacity, dtype=bool),
+            'steers_to_spot': np.zeros(capacity, dtype=bool),
+            'alive': np.zeros(capacity, dtype=bool),
+            'think_due': np.zeros(capacity, dtype=bool),
+            'think_dt': np.zeros(capacity),
+            'phase': np.zeros(capacity, dtype=np.intp),
+        }
+        for name, column in columns.items():
+            if old is not None:
+                column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def add(self, entity, radius=0, speed=0):
+        """Give entity a row.  Returns the row number."""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        row = self.count
+        self.count += 1
+        self.entities.append(entity)
+
+        self.pos[row] = 0
+        self.prev_pos[row] = np.nan
+        self.spot_offset[row] = 0
+        self.knockback[row] = 0
+        self.radius[row] = radius
+        self.speed[row] = speed
+        self.head_to_spot[row] = False
+        self.steers_to_spot[row] = False
+        self.alive[row] = True
+        self.think_due[row] = True
+        self.think_dt[row] = 0
+        self.phase[row] = row
+
+        entity._store = self
+        entity._row = row
+        return row
+
+    COLUMNS = (
+        'pos', 'prev_pos', 'spot_offset', 'knockback', 'radius', 'speed',
+        'head_to_spot', 'steers_to_spot', 'alive', 'think_due', 'think_dt', 'phase',
+    )
+
+    def remove(self, entity):
+        """Release entity's row.
+
+        The entity moves into a little store of its own, so it can
+        still be read and written after it's been removed.
+        """
+        row = entity._row
+        last = self.count - 1
+
+        detached = EnemyStore(capacity=1)
+        detached.add(entity)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            getattr(detached, name)[0] = column[row]
+            if row != last:
+                column[row] = column[last]
+
+        if row != last:
+            moved = self.entities[last]
+            self.entities[row] = moved
+            moved._row = row
+        self.entities.pop()
+        self.count = last
+
+    @property
+    def rows(self):
+        """A slice selecting the rows in use."""
+        return slice(0, self.count)
+
+    def rows_of(self, entities):
+        """Return an int array of the rows owned by entities, in order."""
+        return np.fromiter((e._row for e in entities), dtype=np.intp, count=len(entities))
+
+
+def stored_vector(name):
+    """A property that keeps a Vector2D in an EnemyStore column."""
+    def fget(self):
+        x, y = getattr(self._store, name)[self._row].tolist()
+        return Vector2D(x, y)
+
+    def fset(self, v):
+        getattr(self._store, name)[self._row] = (v[0], v[1])
+
+    return property(fget, fset)
+
+
+def stored_value(name, type=float):
+    """A property that keeps a scalar in an EnemyStore column."""
+    def fget(self):
+        return type(getattr(self._store, name)[self._row])
+
+    def fset(self, v):
+        getattr(self._store, name)[self._row] = v
+
+    return property(fget, fset)
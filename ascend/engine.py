@@ -0,0 +1,30 @@
+"""Where the game gets its wasabi2d from.
+
+Normally that's wasabi2d itself.  Run with --headless (or with
+ASCEND_HEADLESS set in the environment) and it's ascend.headless
+instead: no window, no sound, and the game runs as fast as it can.
+Everything in ascend imports these names from here rather than
+straight from wasabi2d.
+"""
+import os
+import sys
+
+
+HEADLESS = bool(os.environ.get('ASCEND_HEADLESS')) or '--headless' in sys.argv
+
+if HEADLESS:
+    from .headless import (
+        Scene, Vector2, animate, clock, event, keyboard, keys, music, run,
+        sounds,
+    )
+else:
+    from wasabi2d import (
+        Scene, Vector2, animate, clock, event, keys, music, run, sounds,
+    )
+    from wasabi2d.keyboard import keyboard
+
+
+__all__ = [
+    'HEADLESS', 'Scene', 'Vector2', 'animate', 'clock', 'event', 'keyboard',
+    'keys', 'music', 'run', 'sounds',
+]
@@ -0,0 +1,182 @@
+"""Time where each simulation step goes.
+
+Run with --timings (or "frame timings = 1" in the rcfile) and
+Level.larry_update times each phase of every step: the player, the
+objects loop, knockback, the three parts of resolve_collisions, the
+enemy update loop, steering, the per-frame ticks--each kind of tick
+separately, too--and flushing the step's particle emissions.
+
+Percentiles (p50/p95/p99) over the last WINDOW steps of each level
+are printed when the level changes and when the game exits.  With
+--timings-file FILE (or "frame timings file = FILE"), every step is
+also written out as a row, tagged with the level name and entity
+counts: CSV if FILE ends in .csv, otherwise JSON lines.  Only the
+JSON lines carry the per-kind tick timings, as the kinds aren't
+known in advance.
+"""
+import atexit
+import csv
+import json
+import time
+
+import numpy as np
+
+
+PHASES = (
+    'player',
+    'objects',
+    'knockback',
+    'collide_player',
+    'collide_walls',
+    'collide_enemies',
+    'enemies',
+    'steer',
+    'ticks',
+    'particles',
+)
+
+# how many steps the percentiles are taken over
+WINDOW = 600
+
+PERCENTILES = (50, 95, 99)
+
+
+class NullFrameTimer:
+    """What Levels get when timing is off.  Does nothing."""
+
+    def __bool__(self):
+        return False
+
+    def start(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end(self, level):
+        pass
+
+    def report(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+class FrameTimer:
+    """Times phases of a step.
+
+    Call start() at the start of a step, mark(phase) at the end of
+    each phase (the phase took the time since the previous call), and
+    end(level) at the end of the step.  Phases not marked in a step
+    took no time.
+    """
+
+    def __init__(self, path=None):
+        self.perf_counter = time.perf_counter
+        self.index = {phase: i for i, phase in enumerate(PHASES)}
+        self.current = np.zeros(len(PHASES) + 1)
+        # ring buffer of the last WINDOW steps; the last column is the total
+        self.history = np.zeros((WINDOW, len(PHASES) + 1))
+        self.steps = 0
+        # steps in history since the last reset()
+        self.filled = 0
+        self.tick_history = {}
+        self.last_tick_timings = {}
+        self.ticks = None
+        self.level = None
+        self.t0 = self.last = 0.0
+
+        self.file = self.writer = None
+        if path:
+            self.file = open(path, 'w', newline='')
+            if path.endswith('.csv'):
+                self.writer = csv.writer(self.file)
+                self.writer.writerow(('step', 'level', 'num_enemies', 'num_objects', 'num_ticks') + PHASES + ('total',))
+        atexit.register(self.close)
+
+    def start(self):
+        self.current[:] = 0.0
+        self.t0 = self.last = self.perf_counter()
+
+    def mark(self, phase):
+        now = self.perf_counter()
+        self.current[self.index[phase]] += now - self.last
+        self.last = now
+
+    def end(self, level):
+        current = self.current
+        current[-1] = self.last - self.t0
+        i = self.filled % WINDOW
+        self.history[i] = current
+        self.level = level
+
+        tick_timings = self.tick_timings(level.ticks)
+        for kind in tick_timings:
+            if kind not in self.tick_history:
+                self.tick_history[kind] = np.zeros(WINDOW)
+        for kind, history in self.tick_history.items():
+            history[i] = tick_timings.get(kind, 0.0)
+
+        if self.file:
+            counts = (len(level.enemies), len(level.objects), len(level.ticks))
+            ms = [round(t * 1000, 4) for t in current.tolist()]
+            if self.writer:
+                self.writer.writerow((self.steps, level.name) + counts + tuple(ms))
+            else:
+                row = {
+                    'step': self.steps,
+                    'level': level.name,
+                    'num_enemies': counts[0],
+                    'num_objects': counts[1],
+                    'num_ticks': counts[2],
+                }
+                row.update(zip(PHASES + ('total',), ms))
+                row['tick_kinds'] = {kind: round(t * 1000, 4) for kind, t in tick_timings.items() if t}
+                self.file.write(json.dumps(row) + '\n')
+        self.steps += 1
+        self.filled += 1
+
+    def tick_timings(self, ticks):
+        """The time spent in each kind of tick since the last call."""
+        if ticks is not self.ticks:
+            self.ticks = ticks
+            self.last_tick_timings = {}
+        last = self.last_tick_timings
+        timings = {kind: t - last.get(kind, 0.0) for kind, t in ticks.timings.items()}
+        self.last_tick_timings = dict(ticks.timings)
+        return timings
+
+    def percentiles(self):
+        """Return {phase: (p50, p95, p99)} in milliseconds, over the last WINDOW steps."""
+        n = min(self.filled, WINDOW)
+        if not n:
+            return {}
+        history = self.history[:n] * 1000
+        result = dict(zip(
+            PHASES + ('total',),
+            np.percentile(history, PERCENTILES, axis=0).T.tolist(),
+        ))
+        for kind, history in self.tick_history.items():
+            result['tick ' + kind] = np.percentile(history[:n] * 1000, PERCENTILES).tolist()
+        return result
+
+    def report(self):
+        percentiles = self.percentiles()
+        if not percentiles:
+            return
+        print(f"[INFO] Step timings for the last {min(self.filled, WINDOW)} steps of {self.level}, in ms:")
+        print(f"[INFO] {'phase':>20} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for phase, (p50, p95, p99) in percentiles.items():
+            print(f"[INFO] {phase:>20} {p50:>8.3f} {p95:>8.3f} {p99:>8.3f}")
+
+    def reset(self):
+        """Report, then start the percentiles afresh."""
+        self.report()
+        self.filled = 0
+        self.tick_history.clear()
+
+    def close(self):
+        self.report()
+        if self.file and not self.file.closed:
+            self.file.close()
@@ -1,4 +1,4 @@
-from wasabi2d import Scene, event, animate, sounds, music
+from .engine import Scene, event, animate, sounds, music
 from pathlib import Path
 import sys
 
@@ -7,6 +7,9 @@ import ascend
 from . import control
 from .constants import Layers
 from .level import Level
+from .recording import Recorder
+from .frametimer import FrameTimer, NullFrameTimer
+from .particles import ParticleGovernor, NullParticleGroup
 from .vector2d import Vector2D, Polar2D
 
 
@@ -16,7 +19,7 @@ __all__ = [
 
 
 class Game:
-    def __init__(self, settings, gametype):
+    def __init__(self, settings, gametype, argv=None):
         self.settings = settings
         self.gametype = gametype
 
@@ -25,19 +28,57 @@ class Game:
         self.time = 0.0
         self.frame = 0
         self.paused = False
+        # simulation time owed, less than SIM_DT between frames
+        self.accumulator = 0.0
 
         self.use_particles = True
 
-        argv = list(sys.argv)
+        argv = list(sys.argv if argv is None else argv)
         if "--no-particles" in argv:
             argv.remove("--no-particles")
             self.use_particles = False
+        if "--headless" in argv:
+            # handled by ascend.engine
+            argv.remove("--headless")
+        timings = bool(settings.get('frame timings'))
+        if "--timings" in argv:
+            argv.remove("--timings")
+            timings = True
+        timings_path = settings.get('frame timings file')
+        if "--timings-file" in argv:
+            i = argv.index("--timings-file")
+            timings_path = argv[i + 1]
+            del argv[i:i + 2]
+        record_path = None
+        if "--record" in argv:
+            i = argv.index("--record")
+            record_path = argv[i + 1]
+            del argv[i:i + 2]
 
         if len(argv) > 1:
             self.new_game_level = argv[1]
         else:
             self.new_game_level = "title screen"
 
+        self.particles = ParticleGovernor(
+            budget=settings.get('particle budget ms', 20) / 1000,
+            cap=settings.get('particle cap', 4000),
+        )
+
+        if timings or timings_path:
+            self.frame_timer = FrameTimer(timings_path)
+        else:
+            self.frame_timer = NullFrameTimer()
+
+        self.recorder = None
+        if record_path:
+            self.recorder = Recorder(
+                record_path,
+                gametype=gametype,
+                level=self.new_game_level,
+                use_particles=self.use_particles,
+            )
+
         self.reset_game()
 
         event(self.update)
@@ -90,7 +131,7 @@ class Game:
             smoke.add_color_stop(0, '#888888ff')
             smoke.add_color_stop(0.6, '#888888ff')
             smoke.add_color_stop(0.8, '#88888800')
-            scene.smoke = smoke
+            scene.smoke = self.particles.govern('smoke', smoke, max_age=0.8)
 
             sparks = scene.layers[Layers.UPPER_EFFECTS].add_particle_group(
                 texture='spark',
@@ -101,24 +142,28 @@ class Game:
             sparks.add_color_stop(0, (2, 2, 0.8, 1))
             sparks.add_color_stop(0.3, (2, 1, 0, 1))
             sparks.add_color_stop(0.6, (0, 0, 0, 0))
-            scene.sparks = sparks
+            scene.sparks = self.particles.govern('sparks', sparks, max_age=0.6)
 
-            scene.bones = scene.layers[Layers.DEBRIS].add_particle_group(
+            bones = scene.layers[Layers.DEBRIS].add_particle_group(
                 texture='bone',
                 max_age=4,
                 drag=0.1,
                 spin_drag=0.4,
             )
-            scene.skulls = scene.layers[Layers.DEBRIS].add_particle_group(
+            skulls = scene.layers[Layers.DEBRIS].add_particle_group(
                 texture='skull',
                 max_age=4,
                 drag=0.1,
                 spin_drag=0.4,
             )
-            for pgroup in (scene.bones, scene.skulls):
+            for pgroup in (bones, skulls):
                 pgroup.add_color_stop(0, '#bbbbbbff')
                 pgroup.add_color_stop(1, '#bbbbbbff')
                 pgroup.add_color_stop(4, '#bbbbbb00')
+            scene.bones = self.particles.govern('bones', bones, max_age=4)
+            scene.skulls = self.particles.govern('skulls', skulls, max_age=4)
+        else:
+            scene.smoke = scene.sparks = scene.bones = scene.skulls = NullParticleGroup()
 
     def clear_scene(self):
         for layer in dir(Layers):
@@ -137,6 +182,7 @@ class Game:
 
     def go_to_level(self, level):
         print(f"[INFO] Switch to level {level}.")
+        self.frame_timer.reset()
 
         self.delete()
 
@@ -148,23 +194,57 @@ class Game:
         level.populate()
 
     def delete(self):
-        self.clear_scene()
+        # the level's objects delete (or park) their sprites first
         self.delete_level()
+        self.clear_scene()
 
     def delete_level(self):
         if self.level:
             self.level.delete()
             self.level = None
 
-    def update(self, t, dt, keyboard):
-        self.time += dt
-        self.frame += 1
+    # The simulation runs in fixed steps of SIM_DT seconds, however
+    # long frames take to draw; sprites are drawn in between steps.
+    SIM_DT = 1 / 60
+    # After a slow frame, run at most this many steps to catch up and
+    # drop the rest, rather than fall further and further behind.
+    MAX_SIM_STEPS = 8
+    # slop for float error in the accumulator, so a frame SIM_DT long
+    # is always exactly one step
+    SIM_EPSILON = 1e-9
 
+    def update(self, t, dt, keyboard):
         if keyboard.escape:
             sys.exit("[INFO] Quittin' time!")
 
+        inputs = control.read_inputs(keyboard)
+        self.advance(dt, inputs)
+        if self.recorder:
+            self.recorder.frame(dt, inputs, self.level)
+
+    def advance(self, dt, inputs):
+        """Run a frame dt long, with the player doing inputs."""
+        self.particles.observe(dt)
+        self.accumulator += dt
+        steps = 0
+        while self.accumulator + self.SIM_EPSILON >= self.SIM_DT:
+            if steps == self.MAX_SIM_STEPS:
+                self.accumulator = 0.0
+                break
+            self.accumulator = max(self.accumulator - self.SIM_DT, 0.0)
+            self.step(inputs)
+            steps += 1
+
+        if self.level:
+            self.level.interpolate(self.accumulator / self.SIM_DT)
+
+    def step(self, inputs):
+        """Advance the simulation by SIM_DT."""
+        self.time += self.SIM_DT
+        self.frame += 1
+
         if self.level:
-            self.level.update(t, dt, keyboard)
+            self.level.update(self.time, self.SIM_DT, inputs)
 
 
     def win(self):
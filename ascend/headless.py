@@ -0,0 +1,568 @@
+"""A stand-in for the parts of wasabi2d the game uses, with no window.
+
+Layers, sprites, particle groups, the clock, animate(), sounds, music
+and the keyboard all behave as far as the game can tell, but nothing
+is drawn and nothing is played.  That lets a Game and its Levels be
+created and stepped as fast as the simulation will go, on a machine
+with no display or audio device.
+
+Don't import this directly; ascend.engine picks it instead of wasabi2d
+when running headless.
+"""
+import heapq
+import os
+from enum import IntEnum
+from types import MethodType
+from weakref import ref
+
+import numpy as np
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+# with no window to close, leave Ctrl-C and SIGTERM to Python
+os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+import pygame.locals
+from pygame.math import Vector2
+
+
+__all__ = [
+    'Scene', 'Vector2', 'animate', 'clock', 'event', 'keyboard', 'keys',
+    'music', 'run', 'sounds',
+]
+
+
+keys = IntEnum('keys', {
+    (name[2:] if name[2].isalpha() else name).upper(): value
+    for name, value in vars(pygame.locals).items()
+    if name.startswith('K_')
+})
+
+
+class Keyboard:
+    """The keys currently held down.
+
+    keyboard.space or keyboard[keys.SPACE] is True while space is held.
+    Set pressed to feed in input.
+    """
+
+    def __init__(self):
+        self.pressed = set()
+
+    def __getattr__(self, name):
+        if name == 'enter':
+            name = 'return'
+        try:
+            key = keys[name.upper()]
+        except KeyError:
+            raise AttributeError(f'The key "{name}" does not exist') from None
+        return key in self.pressed
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+keyboard = Keyboard()
+
+
+# ---- the clock ----
+
+def _weak(callback):
+    # like wasabi2d, the clock only holds callbacks weakly,
+    # so scheduling something doesn't keep it alive
+    if isinstance(callback, MethodType):
+        self_ref = ref(callback.__self__)
+        func = callback.__func__
+
+        def deref():
+            self = self_ref()
+            return None if self is None else func.__get__(self)
+        return deref
+    try:
+        return ref(callback)
+    except TypeError:
+        return lambda: callback
+
+
+class _Event:
+    __slots__ = 'time', 'order', 'callback', 'repeat'
+
+    def __init__(self, time, order, callback, repeat):
+        self.time = time
+        self.order = order
+        self.callback = callback
+        self.repeat = repeat
+
+    def __lt__(self, other):
+        return (self.time, self.order) < (other.time, other.order)
+
+
+class Clock:
+    """The same scheduling as wasabi2d's clock: tick() runs the each_tick
+    callbacks, then every event that's come due, in time order."""
+
+    def __init__(self):
+        self.t = 0
+        self.fired = False
+        self.events = []
+        self._each_tick = []
+        self._order = 0
+
+    def clear(self):
+        self.events.clear()
+        self._each_tick.clear()
+
+    def _push(self, callback, delay, strong, repeat):
+        self._order += 1
+        callback = (lambda: callback) if strong else _weak(callback)
+        heapq.heappush(self.events, _Event(self.t + delay, self._order, callback, repeat))
+
+    def schedule(self, callback, delay, *, strong=False):
+        self._push(callback, delay, strong, None)
+
+    def schedule_unique(self, callback, delay, *, strong=False):
+        self.unschedule(callback)
+        self.schedule(callback, delay, strong=strong)
+
+    def schedule_interval(self, callback, delay, *, strong=False):
+        self._push(callback, delay, strong, delay)
+
+    def unschedule(self, callback):
+        self.events = [
+            e for e in self.events
+            if e.callback() is not None and e.callback() != callback
+        ]
+        heapq.heapify(self.events)
+        self._each_tick = [r for r in self._each_tick if r() != callback]
+
+    def each_tick(self, callback):
+        self._each_tick.append(_weak(callback))
+
+    def tick(self, dt):
+        self.fired = False
+        self.t += float(dt)
+        for r in tuple(self._each_tick):
+            callback = r()
+            if callback is None:
+                self._each_tick.remove(r)
+            elif r in self._each_tick:
+                # (not if it was unscheduled earlier in this pass)
+                self.fired = True
+                callback(dt)
+
+        while self.events and self.events[0].time <= self.t:
+            event = heapq.heappop(self.events)
+            callback = event.callback()
+            if callback is None:
+                continue
+            if event.repeat is not None:
+                self.schedule_interval(callback, event.repeat)
+            self.fired = True
+            callback()
+
+
+clock = Clock()
+
+
+# ---- animate ----
+
+def _accel_decel(n):
+    p = n * 2
+    if p < 1:
+        return 0.5 * p * p
+    p -= 1.0
+    return -0.5 * (p * (p - 2.0) - 1.0)
+
+
+TWEEN_FUNCTIONS = {
+    'linear': lambda n: n,
+    'accelerate': lambda n: n * n,
+    'decelerate': lambda n: -1.0 * n * (n - 2.0),
+    'accel_decel': _accel_decel,
+}
+
+
+def _tween(n, start, end):
+    if isinstance(start, tuple):
+        return tuple(a + (b - a) * n for a, b in zip(start, end))
+    if isinstance(start, list):
+        return [a + (b - a) * n for a, b in zip(start, end)]
+    return start + (end - start) * n
+
+
+class Animation:
+    """Tween attributes of an object towards targets over duration seconds.
+
+    As in wasabi2d, starting a new animation of an attribute takes it
+    over from any animation already running on it.
+    """
+
+    # strong references to running animations
+    animations = []
+    _by_target = {}
+
+    def __init__(self, object, tween='linear', duration=1, on_finished=None, **targets):
+        try:
+            self.function = TWEEN_FUNCTIONS[tween]
+        except KeyError:
+            raise KeyError(f'No tween called {tween} found.') from None
+        self.object = object
+        self.duration = duration
+        self.on_finished = on_finished
+        self.targets = targets
+        self.t = 0
+        self._running = True
+        self.initial = {}
+        for name in targets:
+            try:
+                self.initial[name] = getattr(object, name)
+            except AttributeError:
+                raise ValueError(f'object {object!r} has no attribute {name} to animate') from None
+            key = id(object), name
+            previous = self._by_target.get(key)
+            if previous is not None:
+                previous._remove_target(name)
+            self._by_target[key] = self
+        clock.each_tick(self.update)
+        self.animations.append(self)
+
+    @property
+    def running(self):
+        return self._running
+
+    def update(self, dt):
+        self.t += dt
+        n = self.t / self.duration if self.duration else 2
+        if n > 1:
+            self.stop(complete=True)
+            if self.on_finished is not None:
+                self.on_finished()
+            return
+        n = self.function(n)
+        for name, target in self.targets.items():
+            setattr(self.object, name, _tween(n, self.initial[name], target))
+
+    def stop(self, complete=False):
+        if not self._running:
+            return
+        self._running = False
+        if complete:
+            for name, target in self.targets.items():
+                setattr(self.object, name, target)
+        for name in list(self.targets):
+            self._remove_target(name, stop=False)
+        clock.unschedule(self.update)
+        self.animations.remove(self)
+
+    def _remove_target(self, name, stop=True):
+        del self.targets[name]
+        del self._by_target[id(self.object), name]
+        if not self.targets and stop:
+            self.stop()
+
+
+def animate(object, tween='linear', duration=1, on_finished=None, **targets):
+    return Animation(object, tween, duration, on_finished=on_finished, **targets)
+
+
+def reset():
+    """Forget every scheduled callback and running animation.
+
+    For starting a fresh game in the same process.
+    """
+    clock.clear()
+    clock.t = 0
+    Animation.animations.clear()
+    Animation._by_target.clear()
+
+
+# ---- sounds and music ----
+
+class Sound:
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def get_length(self):
+        return 0.0
+
+
+class Sounds:
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Sound()
+
+    def load(self, name):
+        return Sound()
+
+
+sounds = Sounds()
+
+
+class Music:
+    volume = 1.0
+
+    def play(self, name):
+        pass
+
+    play_once = queue = play
+
+    def is_playing(self, name):
+        return False
+
+    def pause(self):
+        pass
+
+    unpause = stop = pause
+
+    def fadeout(self, seconds):
+        pass
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+
+music = Music()
+
+
+# ---- the scene ----
+
+class Primitive:
+    """Anything on a layer: a position, angle, scale and color."""
+
+    def __init__(self, layer, pos=(0, 0), angle=0, color=(1, 1, 1, 1), **attrs):
+        self.layer = layer
+        # wasabi2d keeps positions in a float32 matrix and hands out a view
+        self._pos = np.zeros(2, dtype='f4')
+        self._pos[:] = pos
+        self.angle = angle
+        self.color = color
+        self.scale_x = self.scale_y = 1.0
+        self.__dict__.update(attrs)
+        layer.objects.add(self)
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, v):
+        self._pos[:] = v
+
+    @property
+    def x(self):
+        return self._pos[0]
+
+    @x.setter
+    def x(self, v):
+        self._pos[0] = v
+
+    @property
+    def y(self):
+        return self._pos[1]
+
+    @y.setter
+    def y(self, v):
+        self._pos[1] = v
+
+    @property
+    def scale(self):
+        p = self.scale_x * self.scale_y
+        return np.copysign(np.sqrt(abs(p)), p)
+
+    @scale.setter
+    def scale(self, v):
+        self.scale_x = self.scale_y = v
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, v):
+        self._color = v if isinstance(v, str) else np.array(v, dtype='f4')
+
+    def delete(self):
+        self.layer.objects.discard(self)
+
+
+class ParticleGroup:
+    """Counts particles rather than drawing them.
+
+    emit() draws the same random numbers wasabi2d's does, so a run keeps
+    the same random sequence headless or not.  num is how many particles
+    are still alive.
+    """
+
+    def __init__(self, layer, *, grow=1.0, max_age=np.inf, gravity=(0, 0), drag=1.0, spin_drag=1.0):
+        self.layer = layer
+        self.max_age = max_age
+        self.grow = grow
+        self.gravity = gravity
+        self.drag = drag
+        self.spin_drag = spin_drag
+        self.births = []
+        self.emitted = 0
+        layer.objects.add(self)
+
+    def add_color_stop(self, age, color):
+        pass
+
+    def emit(self, num, *, pos, pos_spread=0, vel=(0, 0), vel_spread=0,
+             color=(1, 1, 1, 1), size=1.0, size_spread=0.0, spin=0.0,
+             spin_spread=0.0, angle=0.0, angle_spread=0.0):
+        num = round(num)
+        if num == 0:
+            return
+        np.random.normal(vel, vel_spread, [num, 2])
+        np.random.normal(pos, pos_spread, [num, 2])
+        np.random.normal(size, size_spread, num)
+        np.random.normal(angle, angle_spread, num)
+        np.random.normal(spin, spin_spread, num)
+        self.births.append((clock.t, num))
+        self.emitted += num
+
+    @property
+    def num(self):
+        oldest = clock.t - self.max_age
+        births = self.births
+        while births and births[0][0] < oldest:
+            births.pop(0)
+        return sum(n for _, n in births)
+
+    def delete(self):
+        self.layer.objects.discard(self)
+
+
+class Layer:
+    def __init__(self, group):
+        self.group = group
+        self.objects = set()
+        self.visible = True
+        self.effect = None
+
+    def clear(self):
+        self.objects.clear()
+        self.clear_effect()
+
+    def set_effect(self, name, **kwargs):
+        self.effect = name, kwargs
+
+    def clear_effect(self):
+        self.effect = None
+
+    def add_sprite(self, image, pos=(0, 0), angle=0, anchor=None, color=(1, 1, 1, 1)):
+        return Primitive(self, pos, angle, color, image=image, anchor=anchor)
+
+    def add_circle(self, *, radius, pos=(0, 0), color=(1, 1, 1, 1), fill=True, stroke_width=1.0):
+        return Primitive(self, pos, 0, color, radius=radius, fill=fill, stroke_width=stroke_width)
+
+    def add_star(self, *, points, inner_radius, outer_radius, pos=(0, 0), color=(1, 1, 1, 1), fill=True, stroke_width=1.0):
+        return Primitive(self, pos, 0, color, points=points, inner_radius=inner_radius,
+                         outer_radius=outer_radius, fill=fill, stroke_width=stroke_width)
+
+    def add_polygon(self, vertices, *, pos=(0, 0), color=(1, 1, 1, 1), fill=True, stroke_width=1.0):
+        return Primitive(self, pos, 0, color, vertices=vertices, fill=fill, stroke_width=stroke_width)
+
+    def add_line(self, vertices, *, pos=(0, 0), color=(1, 1, 1, 1), stroke_width=1.0):
+        return Primitive(self, pos, 0, color, vertices=vertices, stroke_width=stroke_width)
+
+    def add_rect(self, width, height, *, pos=(0, 0), color=(1, 1, 1, 1), fill=True):
+        return Primitive(self, pos, 0, color, width=width, height=height, fill=fill)
+
+    def add_label(self, text, *, font=None, align='left', fontsize=20, pos=(0, 0), color=(1, 1, 1, 1)):
+        return Primitive(self, pos, 0, color, text=text, font=font, align=align, fontsize=fontsize)
+
+    def add_particle_group(self, texture=None, **kwargs):
+        return ParticleGroup(self, **kwargs)
+
+
+class LayerGroup(dict):
+    def __missing__(self, key):
+        layer = self[key] = Layer(self)
+        return layer
+
+
+class Camera:
+    def __init__(self, width, height):
+        self.pos = Vector2(width / 2, height / 2)
+
+    def screen_shake(self, dist=25):
+        pass
+
+
+class Scene:
+    def __init__(self, width=800, height=600, title="wasabi2d", background='black',
+                 rootdir=None, **kwargs):
+        self.width = width
+        self.height = height
+        self.title = title
+        self.background = background
+        self.layers = LayerGroup()
+        self.camera = Camera(width, height)
+
+    def screenshot(self, filename=None):
+        pass
+
+    def toggle_recording(self):
+        return False
+
+    def particle_count(self):
+        """How many particles are alive, across every layer."""
+        return sum(
+            o.num
+            for layer in self.layers.values()
+            for o in layer.objects
+            if isinstance(o, ParticleGroup)
+        )
+
+
+# ---- events and the main loop ----
+
+class EventMapper:
+    """Collects event handlers, like wasabi2d's event decorator.
+
+    Only update() handlers ever get called, as there's no window for
+    the other events to come from.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+
+    def __call__(self, handler):
+        self.handlers[handler.__name__] = handler
+        return handler
+
+    def dispatch_update(self, t, dt):
+        handler = self.handlers.get('update')
+        if handler is None:
+            return
+        code = handler.__code__
+        start = 1 if isinstance(handler, MethodType) else 0
+        available = {'t': t, 'dt': dt, 'keyboard': keyboard}
+        handler(**{name: available[name] for name in code.co_varnames[start:code.co_argcount]})
+
+    def run(self, frames=None, dt=1 / 60):
+        """Run the main loop, as fast as possible.
+
+        Each frame ticks the clock then calls the update handler, the
+        same order as wasabi2d.  Runs forever unless frames is given.
+        """
+        t = 0
+        frame = 0
+        while frames is None or frame < frames:
+            t += dt
+            clock.tick(dt)
+            self.dispatch_update(t, dt)
+            frame += 1
+
+
+event = EventMapper()
+run = event.run
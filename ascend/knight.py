@@ -3,10 +3,10 @@ from typing import Any
 from dataclasses import dataclass, field
 
 import numpy as np
-from wasabi2d import Vector2, animate, clock, sounds
+from .engine import Vector2, animate, clock, sounds
 from .vector2d import Vector2D, Polar2D, angle_diff, normalize_angle
-from .collision import polygon_collision
-from .constants import Layers, CollisionType
+from .triangle_intersect import PolygonSet, circles_polygons_collision, convex_hull
+from .constants import Layers
 from .mobs import Prince
 
 from . import control
@@ -106,7 +106,7 @@ class Bomb:
             # sparks stop ominously.
             return
 
-        if self.game.use_particles:
+        if self.scene.sparks:
             self.scene.sparks.emit(
                 num=np.random.poisson(self.SMOKE_RATE * dt),
                 pos=self.sprite.pos,
@@ -121,7 +121,7 @@ class Bomb:
         self.level.objects.remove(self)
         self.sprite.delete()
         self.pos = self.sprite.pos
-        if self.game.use_particles:
+        if self.scene.sparks:
             for pgroup in (self.scene.sparks,):
                 pgroup.emit(
                     num=100,
@@ -147,17 +147,31 @@ class Bomb:
         sounds.explosion2.play()
         self.apply_damage()
 
+    # enemies closer than this die
+    KILL_RADIUS = 150
+
     def apply_damage(self):
-        pos = Vector2(*self.pos)
-        for mob in self.level.enemies:
-            sep = mob.pos - pos
-            mag = sep.magnitude
-            dmg = 100 / (1 + mag)
-            if mag < 150:
-                mob.die(sep * 4)
-            else:
-                # TODO: apply impulse, rather than affecting position
-                mob.move_delta(sep.normalized() * dmg)
+        # indexed by the arrays below
+        enemies = list(self.level.enemies)
+        if not enemies:
+            return
+
+        store = self.level.enemy_store
+        pos = store.pos[store.rows_of(enemies)]
+        sep = pos - (self.pos[0], self.pos[1])
+        mag = np.hypot(sep[:, 0], sep[:, 1])
+        killed = mag < self.KILL_RADIUS
+
+        # survivors are knocked back dmg pixels in total,
+        # spread over the next few frames by Level.apply_knockback.
+        dmg = 100 / (1 + mag)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            impulse = sep * (dmg / mag * self.level.KNOCKBACK_IMPULSE)[:, np.newaxis]
+
+        for i in np.flatnonzero(killed):
+            enemies[i].die(Vector2D(*(sep[i] * 4).tolist()))
+        for i in np.flatnonzero(~killed):
+            enemies[i].knock_back(Vector2D(*impulse[i].tolist()))
 
 
 class Knight:
@@ -190,6 +204,7 @@ class Knight:
             angle=0,
         )
         self.sword.attack = False
+        self.sword.last_swing = None
         self.v = Vector2()
 
         self.pos = Vector2(scene.width, scene.height) * 0.5
@@ -220,13 +235,14 @@ class Knight:
     def update(self, dt):
         """Update the knight this frame."""
 
+        pos = Vector2(*self.pos)
         if self.last_pos:
-            displacement = Vector2(*self.pos - self.last_pos)
+            displacement = pos - self.last_pos
             distance = displacement.length()
             num = np.random.poisson(distance * self.SMOKE_RATE)
             if num:
-                stern = self.pos - displacement.normalize() * 10
-                if self.game.use_particles:
+                stern = pos - displacement.normalize() * 10
+                if self.scene.smoke:
                     self.scene.smoke.emit(
                         num=num,
                         pos=stern,
@@ -243,7 +259,7 @@ class Knight:
             # Scale the knight to simulate gait
             bob = 1.1 + 0.1 * np.sin(self.step / 500)
             self.knight.scale = bob
-        self.last_pos = Vector2(*self.pos)
+        self.last_pos = pos
 
     def throw_bomb(self):
         angle = self.knight.angle
@@ -403,12 +419,12 @@ class KnightController:
             self.knight.angle += min(dt * da * self.TURN, delta)
 
         # Keep within the play area
-        sz = Vector2(self.knight.radius, self.knight.radius)
+        r = self.knight.radius
         scene = self.knight.scene
-        self.knight.pos = np.clip(
-            self.knight.pos + self.v * dt,
-            sz,
-            Vector2(scene.width, scene.height) - sz
+        x, y = self.knight.pos
+        self.knight.pos = (
+            min(max(x + self.v.x * dt, r), scene.width - r),
+            min(max(y + self.v.y * dt, r), scene.height - r),
         )
         self.knight.v = self.v
 
@@ -459,7 +475,7 @@ class Player:
         scene = level.scene
         screen_center = Vector2D(scene.width / 2, scene.height / 2)
         self.starting_pos = Vector2D(screen_center)
-        self.pos = self.starting_pos
+        self.pos = self.prev_pos = self.starting_pos
         self.shape = Knight(level)
         self.shape.knight.pos = self.pos
 
@@ -525,32 +541,48 @@ class Player:
         self.shape.delete()
         self.zone.delete()
 
-    def compute_collision_with_bad_guy(self, bad_guy):
-        if self.dead:
-            return CollisionType.NONE
-
-        distance_vector = self.pos - bad_guy.pos
-        distance_squared = distance_vector.magnitude_squared
-        intersect_outer_radius = distance_squared <= bad_guy.outer_collision_distance_squared
-        if not intersect_outer_radius:
-            return CollisionType.NONE
-
-        # bad_guy intersecting with the zone?
-        if self.zone_layer.visible:
-            if (self.previous_zone_triangle
-                and polygon_collision(self.previous_zone_triangle, bad_guy.pos, bad_guy.radius)):
-                return CollisionType.ZONE
+    def zone_swept_polygon(self):
+        """The area the zone swept through since last frame.
 
-            if polygon_collision(self.zone_triangle, bad_guy.pos, bad_guy.radius):
-                return CollisionType.ZONE
-
-        intersect_body_radius = distance_squared <= bad_guy.body_collision_distance_squared
-        # print(f"    interecting body? {intersect_body_radius}")
+        That's the convex hull of the previous and current zone
+        triangles, or just the current one on the first active frame.
+        """
+        return convex_hull(self.previous_zone_triangle + self.zone_triangle)
 
-        if intersect_body_radius:
-            return CollisionType.PLAYER
+    def classify_bad_guys(self, bad_guys):
+        """Find which bad guys the knight is colliding with, all at once.
 
-    def update(self, dt, keyboard):
+        Returns (zone, body), arrays of the indices into bad_guys of
+        the ones hitting the zone of destruction and the ones hitting
+        the knight's body.  Everybody else isn't touching him.
+        """
+        count = len(bad_guys)
+        nothing = np.zeros(0, dtype=int)
+        if self.dead or not count:
+            return nothing, nothing
+
+        store = self.level.enemy_store
+        rows = store.rows_of(bad_guys)
+        pos = store.pos[rows]
+        radii = store.radius[rows]
+        outer = np.array([b.outer_collision_distance_squared for b in bad_guys], dtype=float)
+        body = np.array([b.body_collision_distance_squared for b in bad_guys], dtype=float)
+
+        delta = pos - (self.pos.x, self.pos.y)
+        distance_squared = np.sum(delta * delta, axis=1)
+        near = distance_squared <= outer
+
+        in_zone = np.zeros(count, dtype=bool)
+        if self.zone_layer.visible and self.zone_triangle and np.any(near):
+            swept = PolygonSet([self.zone_swept_polygon()])
+            candidates = np.flatnonzero(near)
+            pens = circles_polygons_collision(swept, pos[candidates], radii[candidates])
+            in_zone[candidates] = np.any(pens != 0, axis=1)
+
+        in_body = near & ~in_zone & (distance_squared <= body)
+        return np.flatnonzero(in_zone), np.flatnonzero(in_body)
+
+    def update(self, dt, inputs):
         if self.zone_flash_until and (self.zone_flash_until < self.game.time):
             self.zone_flash_until = 0
             self.zone.color = self.normal_zone_color
@@ -562,25 +594,22 @@ class Player:
 
         acceleration = Vector2D()
         for key, vector in control.movement_keys.items():
-            if keyboard[key]:
-                acceleration += vector
+            if inputs[key]:
+                acceleration.iadd(vector)
 
-        if control.button_press():
+        if inputs.button_press():
             if self.can_bomb and self.bombs:
                 self.can_bomb.lock(1)
                 self.bombs.pop().delete()
                 self.level.spawn_bomb(self.pos, self.momentum)
 
-        if control.use_hat:
-            x, y = control.stick.get_hat(0)
+        if inputs.hat is not None:
+            x, y = inputs.hat
             if x or y:
-                acceleration += Vector2D(x, -y)
+                acceleration.iadd((x, -y))
 
-        if control.use_left_stick:
-            acceleration += Vector2D(
-                control.stick.get_axis(0),
-                control.stick.get_axis(1)
-            )
+        if inputs.axes is not None:
+            acceleration.iadd(inputs.axes)
 
         if acceleration.magnitude > 1.0:
             acceleration = acceleration.normalized()
@@ -602,8 +631,7 @@ class Player:
         self.shape.angle = self.zone_angle
 
         starting_pos = self.pos
-        movement_this_frame = self.momentum * dt
-        self.pos += movement_this_frame
+        self.move(self.momentum * dt)
         if self.pos == starting_pos:
             return
 
@@ -629,8 +657,6 @@ class Player:
             # print(f"[{self.game.frame:6} {self.game.time:8}] new self.pos {self.pos} momentum {self.momentum}")
             # print()
 
-        self.zone.pos = self.shape.pos = self.pos
-
         current_speed = self.momentum.magnitude
         # global max_speed_measured
         # new_max = max(max_speed_measured, current_speed)
@@ -674,6 +700,41 @@ class Player:
         # print(f"player pos {self.pos} :: zone angle {self.zone_angle} triangle {self.zone_triangle}")
         self.shape.update(dt)
 
+    # how many times we'll bounce off walls in a single frame
+    max_bounces = 4
+    # stop this far short of a wall we hit
+    wall_skin = 0.01
+
+    def move(self, movement):
+        """Move, bouncing off any walls along the way.
+
+        Sweeps the knight along movement, so even a huge dt can't carry
+        him through a wall.  At each wall hit, both the remaining
+        movement and the momentum are reflected off the wall.
+        """
+        level = self.level
+        for _ in range(self.max_bounces):
+            if not movement:
+                return
+            hit = level.sweep_wall_collisions(self, movement)
+            if not hit:
+                self.pos += movement
+                return
+            t, normal = hit
+            normal = Vector2D(*normal.tolist())
+            self.pos += movement * t + normal * self.wall_skin
+            movement = (movement * (1 - t)).reflected(normal)
+            self.momentum = self.momentum.reflected(normal)
+        # still bouncing after max_bounces, we must be wedged in a
+        # corner.  stay put at the last wall we touched.
+
+    def interpolate(self, alpha):
+        """Draw the knight alpha of the way from prev_pos to pos."""
+        if self.dead:
+            return
+        prev = self.prev_pos
+        self.zone.pos = self.shape.pos = prev + (self.pos - prev) * alpha
+
     def on_collision_zone(self, other):
         """
         self and body are within sword radius.  are they colliding?
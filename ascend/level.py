@@ -2,45 +2,29 @@ import numpy as np
 import math
 import sys
 import random
-import json
-import pkgutil
-from itertools import product
-from pygame import Rect
 
-from wasabi2d import Vector2, animate, sounds, music
+from .engine import Vector2, animate, sounds
 from pygame import joystick
 
 from .knight import Knight, Bomb, Player
 from .mobs import Skeleton, Mage
 
-from .vector2d import Vector2D, Polar2D
-from .wall import Wall
-from .mobs import Shooter, Stalker, Splitter, Blob, Spawner, Prince
+from .vector2d import Vector2D, Vector2DArray, Polar2D
+from .wall import Wall, level_tiles, load_wall_polygons, boundary_wall_polygons
+from .ticks import TickRegistry
+from .wallindex import WallIndex
+from .collision import separate_circles, segment_circles_collision
+from .enemystore import EnemyStore
+from .lod import LevelOfDetail
+from .pool import Pool
+from .roster import Roster
+from .triangle_intersect import PolygonSet, circles_polygons_collision, swept_polygon_collision, convex_hull
+from .mobs import Shooter, Stalker, Splitter, Blob, Spawner, Prince, BadGuy
 from .knight import KnightController
 from .control import JoyController, KeyboardController
 
 from . import control
-from .constants import Layers, CollisionType
-
-
-def line_segment_intersects_circle(start, along, center, radius):
-    Q = center                  # Centre of circle
-    r = radius                  # Radius of circle
-    P1 = start      # Start of line segment
-    V = along
-    a = np.dot(V, V)
-    b = 2 * np.dot(V, P1 - Q)
-    c = np.dot(P1, P1) + np.dot(Q, Q) - 2 * np.dot(P1, Q) - r * r
-    disc = b * b - 4 * a * c
-    if disc < 0:
-        return None
-    sqrt_disc = math.sqrt(disc)
-    t1 = (-b + sqrt_disc) / (2 * a)
-    t2 = (-b - sqrt_disc) / (2 * a)
-    if not (0 <= t1 <= 1 or 0 <= t2 <= 1):
-        return None
-    t = max(0, min(1, - b / (2 * a)))
-    return P1 + t * V
+from .constants import Layers, SPEED_FPS
 
 
 class Level:
@@ -49,12 +33,21 @@ class Level:
         self.scene = game.scene
 
         self.pcs = []
-        self.objects = []
+        # see roster.py: deletions are applied by remove_deleted()
+        self.objects = Roster()
 
         self.player = None
-        self.enemies = []
+        self.enemies = Roster()
+        self.enemy_store = EnemyStore()
         self.shooters = set()
         self.walls = []
+        # things that animate themselves every frame
+        self.ticks = TickRegistry()
+        self.timer = game.frame_timer
+        # far away enemies update less often, see lod.py
+        self.lod = LevelOfDetail(self)
+        # reusable effects, see pool.py
+        self.pools = {}
         self.update = self.larry_update
         self.name = name
         self.next = None
@@ -66,6 +59,13 @@ class Level:
     def __repr__(self):
         return f"<Level {self.name!r}>"
 
+    def pool(self, cls):
+        """Return the level's pool of cls objects."""
+        pool = self.pools.get(cls)
+        if pool is None:
+            pool = self.pools[cls] = Pool(cls, self)
+        return pool
+
     def dan_new_level(self):
         self.create_players()
         self.spawn_mobs(num=20)
@@ -115,7 +115,7 @@ class Level:
                 Mage(self, Vector2(x, y), angle)
             )
 
-    def dan_update(self, t, dt, keyboard):
+    def dan_update(self, t, dt, inputs):
         for controller in self.controllers:
             controller.update(dt)
 
@@ -128,30 +128,56 @@ class Level:
         for o in self.objects:
             o.update(dt)
 
+        self.ticks.tick(dt)
+        self.game.particles.flush()
         self.test_attacks()
         self.resolve_collisions()
+        self.remove_deleted()
 
     def test_attacks(self):
         for pc in self.pcs:
-            if not pc.sword.attack:
+            sword = pc.sword
+            if not sword.attack:
+                sword.last_swing = None
                 continue
 
             pos = pc.pos
-            sword = pc.sword.angle
-            dir = Vector2(np.cos(sword), np.sin(sword))
+            angle = sword.angle
+            dir = Vector2(np.cos(angle), np.sin(angle))
             start = pos + dir * 12
+            along = dir * 40
+            swing = [tuple(start), tuple(start + along)]
+
+            # the sword can swing right past a mob between frames,
+            # so also test the area it swept since the last frame.
+            last_swing = sword.last_swing
+            sword.last_swing = swing
 
-            new_mobs = []
-            for mob in self.mobs:
-                if line_segment_intersects_circle(start, dir * 40, mob.pos, 20) is not None:
+            if not self.mobs:
+                continue
+            centers = np.array([tuple(mob.pos) for mob in self.mobs], dtype=float)
+            hits = segment_circles_collision(start, along, centers, 20)
+            swept = convex_hull(last_swing + swing) if last_swing else ()
+            if len(swept) >= 3:
+                swept = PolygonSet([swept])
+                hits |= np.any(circles_polygons_collision(swept, centers, 20) != 0, axis=1)
+
+            if not np.any(hits):
+                continue
+            survivors = []
+            for mob, hit in zip(self.mobs, hits):
+                if hit:
                     sep = mob.pos - pc.pos
-                    mob.die(pc.v + sep.normalize() * 30)
+                    mob.die(pc.v + sep.scaled(30))
                 else:
-                    new_mobs.append(mob)
-            self.mobs[:] = new_mobs
+                    survivors.append(mob)
+            self.mobs[:] = survivors
 
     def resolve_collisions(self):
-        """Push actors apart. This is O(n^2) and can be improved.
+        """Push actors apart.
+
+        Enemy-vs-enemy separation uses a uniform grid broadphase,
+        see separate_circles().
 
         Note that this will not completely separate everything every frame
         due to a later collision causing a new intrusion on a previously
@@ -160,68 +186,105 @@ class Level:
 
         """
         player = self.player
-        for mob in self.enemies[:]:
-            collision = player.compute_collision_with_bad_guy(mob)
-
-            if collision == CollisionType.ZONE:
-                player.on_collision_zone(mob)
-                mob.on_collide_zone()
-            elif collision == CollisionType.PLAYER:
-                player.on_collision_body(mob)
-                mob.on_collide_player()
+        timer = self.timer
+        # classify_bad_guys() answers with indices into this
+        enemies = list(self.enemies)
+        zone, body = player.classify_bad_guys(enemies)
+
+        for i in zone:
+            mob = enemies[i]
+            player.on_collision_zone(mob)
+            mob.on_collide_zone()
+
+        # once the player's dead, the rest of body go on to the walls
+        handled = len(body)
+        for n, i in enumerate(body):
+            if player.dead:
+                handled = n
+                break
+            mob = enemies[i]
+            player.on_collision_body(mob)
+            mob.on_collide_player()
+        timer.mark('collide_player')
+
+        # wall penetration doesn't depend on the other enemies,
+        # so resolve all of them against the walls in one go.
+        untouched = np.ones(len(enemies), dtype=bool)
+        untouched[zone] = untouched[body[:handled]] = False
+        others = [mob for mob, keep in zip(enemies, untouched) if keep and not mob.dead]
+        wall_penetrations = self.detect_wall_collisions_batch(others)
+        store = self.enemy_store
+        for mob, penetration in zip(others, wall_penetrations):
+            if penetration.any():
+                if mob.die_on_any_collision:
+                    mob.delete()
+                    continue
+                row = mob.row
+                store.pos[row] -= penetration
+                mob.shape.pos = store.pos[row].tolist()
+        timer.mark('collide_walls')
+
+        rows = store.rows_of(self.enemies)
+        positions = store.pos[rows].tolist()
+        if separate_circles(positions, store.radius[rows].tolist()):
+            store.pos[rows] = positions
+        timer.mark('collide_enemies')
+
+    def update_enemies(self, dt):
+        """Call update() on the enemies due one this step.
+
+        Far from the player, that's not every step; see lod.py.  The
+        ones sitting this step out save dt up for next time.
+        """
+        store = self.enemy_store
+        self.lod.plan(store)
+        # enemies added during the loop (say, a shot) are due straight
+        # away, and the store's arrays may grow, so look them up each time
+        for enemy in self.enemies:
+            row = enemy.row
+            if store.think_due[row] or enemy.full_rate:
+                owed = float(store.think_dt[row])
+                store.think_dt[row] = 0.0
+                enemy.update(owed + dt)
             else:
-                penetration_vector = self.detect_wall_collisions(mob)
-                if penetration_vector:
-                    if mob.die_on_any_collision:
-                        mob.delete()
-                        return
-                    mob.pos -= penetration_vector
-                    mob.shape.pos = mob.pos
-
-        for i, mob1 in enumerate(self.enemies):
-            p1 = mob1.pos
-            r1 = mob1.radius
-            for mob2 in self.enemies[i + 1:]:
-                r2 = mob2.radius
-                r = r1 + r2
-                p2 = mob2.pos
-                sep = Vector2(*p2 - p1)
-                if sep.magnitude_squared() < r * r:
-                    mag = sep.magnitude()
-                    overlap = r - mag
-                    if mag:
-                        sep.normalize_ip()
-                    else:
-                        sep = Vector2(0, 1)
-                    frac = (r1 * r1) / (r1 * r1 + r2 * r2)
-                    mob1.pos = p1 - sep * overlap * (1.0 - frac)
-                    mob2.pos = p2 + sep * overlap * frac
+                store.think_dt[row] += dt
+
+    def steer_enemies(self, dt):
+        """Move every enemy that steers towards a spot near the player.
+
+        Each heads for its spot until it's within spot_low_watermark of
+        the player, then straight for the player until it's further than
+        spot_high_watermark (see BadGuy).
+        Sprites catch up in interpolate().
+        """
+        store = self.enemy_store
+        rows = np.flatnonzero(store.steers_to_spot[store.rows] & store.alive[store.rows])
+        if not (len(rows) and self.player):
+            return
+
+        pos = Vector2DArray(store.pos[rows])
+        player_pos = self.player.pos
+
+        distance_to_player = (player_pos - pos).magnitude
+        threshold = np.where(
+            store.head_to_spot[rows],
+            BadGuy.spot_low_watermark,
+            BadGuy.spot_high_watermark,
+            )
+        head_to_spot = distance_to_player > threshold
+        target = player_pos + Vector2DArray(store.spot_offset[rows]) * head_to_spot
+
+        pos.iadd((target - pos).clamped(store.speed[rows] * (dt * SPEED_FPS)))
+
+        store.head_to_spot[rows] = head_to_spot
+        store.pos[rows] = pos.array
 
     def build_spatial_hash(self):
-        self.wall_hash = {}
-        for w in self.walls:
-            for k in self.hash_coords(w.r):
-                self.wall_hash.setdefault(k, []).append(w)
-
-    HASH_SCALE = 30
-
-    def hash_coords(self, rect):
-        """Get an iterable of spatial hash keys."""
-        s = self.HASH_SCALE
-        l = rect.left // s
-        r = rect.right // s + 1
-        t = rect.top // s
-        b = rect.bottom // s + 1
-        return product(range(l, r), range(t, b))
+        self.wall_set = PolygonSet([w.geometry for w in self.walls])
+        self.wall_index = WallIndex(self.walls)
 
     def detect_wall_collisions(self, entity):
-        w = entity.radius * 2
-        r = Rect(*entity.pos, w, w)
-        hit_walls = set()
-        for k in self.hash_coords(r):
-            ws = self.wall_hash.get(k)
-            if ws:
-                hit_walls.update(ws)
+        hit_walls = self.wall_index.query(entity.pos, entity.radius)
         if not hit_walls:
             return None
 
@@ -241,6 +304,55 @@ class Level:
             cumulative_vector += collision
         return cumulative_vector
 
+    def sweep_wall_collisions(self, entity, motion):
+        """Find where entity first hits a wall moving along motion.
+
+        Returns (t, normal) like swept_polygon_collision() for the
+        earliest hit against any wall, or None.
+        """
+        x, y = entity.pos
+        mx, my = motion
+        half = math.hypot(mx, my) / 2
+        center = (x + mx / 2, y + my / 2)
+        first = None
+        for wall in self.wall_index.query(center, entity.radius + half):
+            hit = swept_polygon_collision(wall.geometry, entity.pos, motion, entity.radius)
+            if hit and ((first is None) or (hit[0] < first[0])):
+                first = hit
+        return first
+
+    def detect_wall_collisions_batch(self, entities):
+        """Compute wall penetration vectors for many enemies at once.
+
+        Returns an (N, 2) array, one row per entity,
+        zero where the entity isn't touching a wall.
+        """
+        store = self.enemy_store
+        rows = store.rows_of(entities)
+        return circles_polygons_collision(self.wall_set, store.pos[rows], store.radius[rows])
+
+    # Knockback velocity is multiplied by this every second.
+    KNOCKBACK_DRAG = 0.002
+    # An impulse of KNOCKBACK_IMPULSE * d pixels/s decaying at
+    # KNOCKBACK_DRAG carries an enemy d pixels in total.
+    KNOCKBACK_IMPULSE = -math.log(KNOCKBACK_DRAG)
+    # Below this speed (pixels/s) knockback stops.
+    KNOCKBACK_MIN_SPEED = 0.25
+
+    def apply_knockback(self, dt):
+        """Move every knocked-back enemy along its knockback velocity."""
+        store = self.enemy_store
+        knockback = store.knockback[store.rows]
+        moving = np.flatnonzero(np.any(knockback != 0, axis=1))
+        if not len(moving):
+            return
+
+        velocity = Vector2DArray(knockback[moving])
+        store.pos[moving] += (velocity * dt).array
+        velocity.imul(self.KNOCKBACK_DRAG ** dt)
+        velocity[velocity.magnitude < self.KNOCKBACK_MIN_SPEED] = 0
+        store.knockback[moving] = velocity.array
+
     def new_player(self):
         self.player = Player(self)
         self.pcs.append(self.player)
@@ -251,15 +363,19 @@ class Level:
         self.player.delete()
         self.player = None
 
-    def larry_update(self, t, dt, keyboard):
+    def larry_update(self, t, dt, inputs):
         if not self.player:
             return
 
+        self.player.prev_pos = self.player.pos
+        store = self.enemy_store
+        store.prev_pos[store.rows] = store.pos[store.rows]
+
         if self.game.paused:
             # debounce button
-            new_game_button_pressed = keyboard.space
-            if not new_game_button_pressed and control.stick:
-                new_game_button_pressed = control.stick.get_button(0)
+            new_game_button_pressed = inputs.space
+            if not new_game_button_pressed and inputs.stick:
+                new_game_button_pressed = inputs.button(0)
 
             if new_game_button_pressed:
                 self.proceed_on_button_release = True
@@ -273,21 +389,75 @@ class Level:
                     self.game.paused = False
                 else:
                     self.next_level()
+            # gibs and the like keep moving while we're paused
+            self.lod.start(self.player)
+            self.ticks.tick(dt)
+            self.game.particles.flush()
+            self.remove_deleted()
             return
 
+        timer = self.timer
+        timer.start()
+
         if self.player:
-            self.player.update(dt, keyboard)
+            self.player.update(dt, inputs)
+        self.lod.start(self.player)
+        timer.mark('player')
 
-        for o in self.objects[:]:
+        for o in self.objects:
             o.update(dt)
+        timer.mark('objects')
+
+        self.apply_knockback(dt)
+        timer.mark('knockback')
 
         if not self.enemies:
             self.level_complete()
         else:
             # TODO: decide we allow enemies to overlap
             self.resolve_collisions()
-            for enemy in self.enemies:
-                enemy.update(dt)
+            self.update_enemies(dt)
+            timer.mark('enemies')
+            self.steer_enemies(dt)
+            timer.mark('steer')
+
+        self.ticks.tick(dt)
+        timer.mark('ticks')
+        self.game.particles.flush()
+        timer.mark('particles')
+        self.remove_deleted()
+        timer.end(self)
+
+    def remove_deleted(self):
+        """Take whatever was deleted during the step out of the level.
+
+        This is the one place enemies and objects actually leave
+        self.enemies and self.objects; until then they are only
+        marked, see roster.py.
+        """
+        self.enemies.flush()
+        self.objects.flush()
+
+    def interpolate(self, alpha):
+        """Draw everything alpha of the way from the last simulation step to this one.
+
+        Game.update calls this once per frame, after running however
+        many simulation steps fit in the frame.
+        """
+        if self.player:
+            self.player.interpolate(alpha)
+
+        store = self.enemy_store
+        if not store.count:
+            return
+        pos = store.pos[store.rows]
+        prev = store.prev_pos[store.rows]
+        drawn = prev + (pos - prev) * alpha
+        fresh = np.isnan(prev[:, 0])
+        drawn[fresh] = pos[fresh]
+        for mob, (x, y) in zip(store.entities, drawn.tolist()):
+            if mob.shape:
+                mob.shape.pos = (x, y)
 
     def populate(self):
         print("[INFO] Spawning player and enemies...")
@@ -550,14 +720,14 @@ class Level:
         pass
 
 
-    def title_screen_update(self, t, dt, keyboard):
+    def title_screen_update(self, t, dt, inputs):
         # debounce button
-        endless_pressed = keyboard.k_1
-        new_game_button_pressed = keyboard.space
+        endless_pressed = inputs.k_1
+        new_game_button_pressed = inputs.space
         button_pressed = endless_pressed or new_game_button_pressed
-        if not button_pressed and control.stick:
-            endless_pressed = control.stick.get_button(3)
-            new_game_button_pressed = control.stick.get_button(0)
+        if not button_pressed and inputs.stick:
+            endless_pressed = inputs.button(3)
+            new_game_button_pressed = inputs.button(0)
 
         if new_game_button_pressed:
             self.proceed_on_button_release = "1"
@@ -576,13 +746,18 @@ class Level:
 
         self.pcs = []
 
-        for enemy in tuple(self.enemies):
+        for enemy in self.enemies:
             enemy.delete()
+        self.enemies.flush()
         assert not self.enemies, "enemies should be empty but isn't: " + repr(self.enemies)
 
-        for o in tuple(self.objects):
+        for o in self.objects:
             o.delete()
+        self.objects.flush()
         assert not self.objects, "self.objects should be empty but isn't: " + repr(self.objects)
+        if self.pools:
+            print("[INFO]", ", ".join(repr(pool) for pool in self.pools.values()))
+        self.pools.clear()
 
         for wall in tuple(self.walls):
             wall.delete()
@@ -605,13 +780,7 @@ def generate_level(level, *, left=None, mid=None, right=None, flip=False):
 
     scene = level.scene
 
-    l = 17
-    t = 34
-    sprites = [
-        (f'bg-end-{left}', (l + 165, 350 + t), 0),
-        (f'bg-mid-{mid}', (l + 165 + 330, 350 + t), 0),
-        (f'bg-end-{right}', (l + 165 + 660, 350 + t), math.pi),
-    ]
+    sprites = level_tiles(left, mid, right)
     for name, pos, rotation in sprites:
         w = scene.layers[Layers.ENTITIES].add_sprite(f'{name}-wall', pos=pos)
         w.angle = rotation
@@ -623,12 +792,7 @@ def generate_level(level, *, left=None, mid=None, right=None, flip=False):
     walls = level.walls
 
     for fname, pos, rotation in sprites:
-        data = pkgutil.get_data(__name__, f'walldata/{fname}-walls.json')
-        pts = json.loads(data.decode('ascii'))
-
-        pos = Vector2D(pos)
-        for loop in pts:
-            poly = [pos + Vector2D(x - 165, y - 350).rotated(rotation) for x, y in loop]
+        for poly in load_wall_polygons(fname, pos, rotation):
             walls.append(Wall(level, poly, visible=False))
 
     p1, p2 = sprites[0][1], sprites[2][1]
@@ -639,7 +803,7 @@ def generate_level(level, *, left=None, mid=None, right=None, flip=False):
         pos=p1
     )
     if level.player:
-        level.player.pos = Vector2D(trapdoor.pos)
+        level.player.pos = level.player.prev_pos = Vector2D.from_pos(trapdoor)
         level.player.shape.pos = level.player.pos
     scene.layers[Layers.FLOOR].add_sprite(
         'stairs',
@@ -647,21 +811,7 @@ def generate_level(level, *, left=None, mid=None, right=None, flip=False):
     )
 
     # add invisible walls outside the level
-    big_number = 400
-    inset_x = 10
-    inset_y = 30
-    wall_pairs = [
-        ( (-big_number, -big_number), (scene.width + big_number, inset_y) ),
-        ( (scene.width - inset_x, -big_number), (scene.width + big_number, scene.height + big_number) ),
-        ( (-big_number, scene.height - inset_y), (scene.width + big_number, scene.height + big_number) ),
-        ( (-big_number, -big_number), (inset_x, scene.height + big_number) ),
-        ]
-
-    for pairs in wall_pairs:
-        ul = Vector2D(pairs[0])
-        lr = Vector2D(pairs[1])
-        points = [(ul.x, ul.y), (lr.x, ul.y), (lr.x, lr.y), (ul.x, lr.y), ]
-
+    for points in boundary_wall_polygons(scene.width, scene.height):
         wall = Wall(level, points, visible=False)
         walls.append(wall)
 
@@ -0,0 +1,117 @@
+"""Level of detail: far from the player, enemies update less often.
+
+Nobody can tell whether a skeleton on the far side of the arena turned
+its head this step or four steps ago, and in a big Endless wave most
+enemies are a long way off.  So each step the LevelOfDetail works out
+how far every enemy is from the player and picks how often it updates:
+
+    nearer than NEAR    every step
+    nearer than FAR     every 2nd step
+    further             every 4th step
+
+An enemy that sits out a step has its dt saved up, and gets the lot
+the next time it updates, so nothing slows down.  Enemies are staggered
+by their phase (their row when they were added), so the far ones don't
+all update on the same step.
+
+This is only for the enemies' update() (see Level.update_enemies); steering,
+collisions and knockback work on every enemy every step, all at once,
+and aren't throttled.  An enemy class with full_rate set, like Shot,
+always updates.
+
+Visual-only work--gait bobbing, turning heads, trailing smoke--goes
+through throttle(), which runs a tick less often by the same rule but
+with the nearer LOOK_NEAR and LOOK_FAR, as it's cheaper to get away
+with there.
+"""
+import itertools
+
+import numpy as np
+
+
+NEAR = 300
+FAR = 600
+
+LOOK_NEAR = 200
+LOOK_FAR = 400
+
+# how often, in steps, for near, middle and far
+EVERY = (1, 2, 4)
+
+
+class LevelOfDetail:
+    def __init__(self, level):
+        self.level = level
+        self.step = 0
+        # where the player is this step, or None to update everything
+        self.player_pos = None
+        self.phases = itertools.count()
+
+    def start(self, player):
+        """Start a step, with the player wherever they've moved to."""
+        self.step += 1
+        if player:
+            x, y = player.pos
+            self.player_pos = (float(x), float(y))
+        else:
+            self.player_pos = None
+
+    def plan(self, store):
+        """Work out which enemies in store update this step.
+
+        Sets store.think_due for each of them.
+        """
+        rows = store.rows
+        if self.player_pos is None:
+            store.think_due[rows] = True
+            return
+        offset = store.pos[rows] - self.player_pos
+        distance_squared = np.einsum('ij,ij->i', offset, offset)
+        every = np.where(
+            distance_squared < NEAR * NEAR,
+            EVERY[0],
+            np.where(distance_squared < FAR * FAR, EVERY[1], EVERY[2]),
+        )
+        store.think_due[rows] = (self.step + store.phase[rows]) % every == 0
+
+    def every(self, pos):
+        """How often, in steps, to do visual-only work at pos."""
+        if self.player_pos is None:
+            return EVERY[0]
+        px, py = self.player_pos
+        x, y = pos
+        dx = x - px
+        dy = y - py
+        distance_squared = dx * dx + dy * dy
+        if distance_squared < LOOK_NEAR * LOOK_NEAR:
+            return EVERY[0]
+        if distance_squared < LOOK_FAR * LOOK_FAR:
+            return EVERY[1]
+        return EVERY[2]
+
+    def throttle(self, callback, pos):
+        """Wrap callback, a tick doing visual-only work, to run less often far away.
+
+        pos is called for where the work is happening.
+        """
+        return Throttle(self, callback, pos, next(self.phases))
+
+
+class Throttle:
+    """A tick that calls callback(dt) every few steps, with dt saved up."""
+
+    def __init__(self, lod, callback, pos, phase):
+        self.lod = lod
+        self.callback = callback
+        self.pos = pos
+        self.phase = phase
+        self.dt = 0.0
+
+    def __call__(self, dt):
+        self.dt += dt
+        lod = self.lod
+        if (lod.step + self.phase) % lod.every(self.pos()):
+            return
+        dt = self.dt
+        self.dt = 0.0
+        self.callback(dt)
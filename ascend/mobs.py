@@ -2,13 +2,15 @@ import math
 import random
 import numpy as np
 
-from wasabi2d import Vector2, animate, clock, sounds
-from .constants import Layers, CollisionType
+from .engine import animate, clock, sounds
+from .constants import Layers, CollisionType, SPEED_FPS
 from .vector2d import Vector2D, Polar2D
 from .collision import entity_collision
+from .enemystore import stored_vector, stored_value
+from .pool import Pooled, PARKED
 
 
-class MagicMissile:
+class MagicMissile(Pooled):
     SMOKE_RATE = 20
     SPEED = 200
     SPIN = 0.5
@@ -17,16 +19,27 @@ class MagicMissile:
         self.level = level
         self.game = level.game
         self.scene = level.scene
-        self.vel = vel
         self.sprite = self.scene.layers[Layers.UPPER_EFFECTS].add_sprite(
             'spark',
             pos=pos,
         )
+        self.activate(pos, vel)
+
+    def activate(self, pos, vel):
+        self.deleted = False
+        self.vel = vel
+        self.sprite.pos = pos
+        self.sprite.angle = 0
         self.sprite.color = (0.4, 2.0, 0.4, 1.0)
         self.sprite.scale = 0.3
         self.age = 0
         self.level.objects.append(self)
-        clock.each_tick(self.update)
+        self.level.ticks.add(self, self.tick)
+
+    def deactivate(self):
+        self.level.ticks.remove(self)
+        self.level.objects.remove(self)
+        self.sprite.pos = PARKED
 
     @property
     def pos(self):
@@ -37,7 +50,11 @@ class MagicMissile:
         self.sprite.pos = v
 
     def update(self, dt):
-        if self.game.use_particles:
+        # level.ticks calls tick() for us
+        pass
+
+    def tick(self, dt):
+        if self.scene.smoke:
             self.scene.smoke.emit(
                 num=np.random.poisson(self.SMOKE_RATE * dt),
                 pos=self.sprite.pos,
@@ -48,6 +65,7 @@ class MagicMissile:
                 angle_spread=3,
                 color=(0, 1, 0, 1.0),
             )
+        if self.scene.sparks:
             self.scene.sparks.emit(
                 num=np.random.poisson(self.SMOKE_RATE * dt),
                 pos=self.sprite.pos,
@@ -59,20 +77,18 @@ class MagicMissile:
                 color=(0.2, 1, 0.2, 1),
             )
 
-    deleted = False
     def delete(self):
         """Remove the missile from the level."""
         if not self.deleted:
             self.deleted = True
-            clock.unschedule(self.update)
-            self.level.objects.remove(self)
-            self.sprite.delete()
+            self.deactivate()
+            self.level.pool(type(self)).release(self)
 
     def hit(self):
         """Kill the missile, showing an effect like it hit something."""
         pos = self.sprite.pos
 
-        if self.game.use_particles:
+        if self.scene.smoke:
             self.scene.smoke.emit(
                 num=25,
                 pos=pos,
@@ -90,8 +106,8 @@ class MagicMissile:
 class TimedMagicMissile(MagicMissile):
     EXPLODE_TIME = 1
 
-    def update(self, dt):
-        super().update(dt)
+    def tick(self, dt):
+        super().tick(dt)
 
         self.sprite.pos += self.vel * dt
         self.sprite.angle += self.SPIN * dt
@@ -102,7 +118,7 @@ class TimedMagicMissile(MagicMissile):
             return
 
 
-class BombPowerup:
+class BombPowerup(Pooled):
     def __init__(self, level: 'ascend.level.Level', pos):
         self.level = level
         scene = level.scene
@@ -110,23 +126,33 @@ class BombPowerup:
             'bomb-up',
             pos=pos
         )
+        self.activate(pos)
+
+    def activate(self, pos):
+        self.deleted = False
+        self.sprite.pos = pos
+        self.sprite.color = 'white'
         self.vel = Vector2D(
             random.uniform(-100, 100),
             random.uniform(-100, 100),
         )
         self.collectable = False
-        level.objects.append(self)
+        self.level.objects.append(self)
         clock.schedule(self.blink_on, 0.5)
 
+    def deactivate(self):
+        clock.unschedule(self.blink_on)
+        clock.unschedule(self.blink_off)
+        self.level.objects.remove(self)
+        self.sprite.pos = PARKED
+
     def blink_on(self):
         self.collectable = True
-        if self.sprite:
-            self.sprite.color = (2, 2, 2, 1)
+        self.sprite.color = (2, 2, 2, 1)
         clock.schedule(self.blink_off, 0.1)
 
     def blink_off(self):
-        if self.sprite:
-            self.sprite.color = 'white'
+        self.sprite.color = 'white'
         clock.schedule(self.blink_on, 0.5)
 
     def update(self, dt):
@@ -140,16 +166,17 @@ class BombPowerup:
             player.add_bomb()
 
     def delete(self):
-        self.sprite.delete()
-        self.sprite = None
-        self.level.objects.remove(self)
+        if not self.deleted:
+            self.deleted = True
+            self.deactivate()
+            self.level.pool(BombPowerup).release(self)
 
 
-class Gib:
+class Gib(Pooled):
     @classmethod
     def shower(cls, level, pos, num=8, vel=Vector2D()):
         for _ in range(num):
-            cls(level, pos, vel)
+            cls.spawn(level, pos, vel)
 
     radius = 4
 
@@ -157,19 +184,30 @@ class Gib:
         self.scene = level.scene
         self.level = level
         self.game = level.game
-        self.level.objects.append(self)
         self.sprite = self.scene.layers[Layers.LOWER_EFFECTS].add_sprite(
             'smoke',
             pos=pos,
             color='#800000ff',
         )
+        self.activate(pos, vel)
+
+    def activate(self, pos, vel=Vector2D()):
+        self.deleted = False
+        self.level.objects.append(self)
+        self.sprite.pos = pos
+        self.sprite.color = '#800000ff'
         self.sprite.scale = 0.2
         self.vel = Vector2D(
             np.random.normal(0, 100),
             np.random.normal(0, 100),
         ) + vel
         self.age = 0
-        clock.each_tick(self.my_update)
+        self.level.ticks.add(self, self.my_update)
+
+    def deactivate(self):
+        self.level.objects.remove(self)
+        self.level.ticks.remove(self)
+        self.sprite.pos = PARKED
 
     @property
     def pos(self):
@@ -187,15 +225,14 @@ class Gib:
     def my_update(self, dt):
         self.age += dt
         self.vel *= 0.2 ** dt
-        if self.sprite:
-            self.sprite.pos += self.vel * dt
-            self.sprite.scale -= 0.2 * dt
+        self.sprite.pos += self.vel * dt
+        self.sprite.scale -= 0.2 * dt
 
         if self.age > 1:
             self.delete()
             return
 
-        if self.game.use_particles:
+        if self.scene.smoke:
             self.scene.smoke.emit(
                 num=np.random.poisson(self.vel.magnitude * dt * self.BLOOD_RATE),
                 pos=self.sprite.pos,
@@ -206,14 +243,11 @@ class Gib:
                 color='#cc0000ff'
             )
 
-    deleted = False
     def delete(self):
         if not self.deleted:
             self.deleted = True
-            self.level.objects.remove(self)
-            clock.unschedule(self.update)
-            self.sprite.delete()
-            self.sprite = None
+            self.deactivate()
+            self.level.pool(Gib).release(self)
 
 
 class Skeleton:
@@ -241,27 +275,26 @@ class Skeleton:
         self.last_pos = Vector2D()
         self.gait_speed = random.uniform(0.007, 0.009)
         self.gait_step = random.uniform(1.07, 1.2)
-        clock.each_tick(self.update)
+        # all for show, so it can be done less often far away
+        level.ticks.add(self, level.lod.throttle(self.update, lambda: self.head.pos))
 
     SPEED = 30
 
     @property
     def pos(self):
-        return Vector2(*self.head.pos)
+        return Vector2D.from_pos(self.head)
 
     @pos.setter
     def pos(self, v):
         self.head.pos = self.body.pos = v
 
     def update(self, dt):
+        cur_pos = Vector2D.from_pos(self.head)
         target = self.level.player
         if target:
-            to_target = Vector2(*target.pos - self.head.pos)
-            dist, angle_deg = to_target.as_polar()
-            angle_to_target = math.radians(angle_deg)
+            angle_to_target = (target.pos - cur_pos).angle()
             self.head.angle = angle_to_target
 
-        cur_pos = Vector2D(self.head.pos)
         dist = (cur_pos - self.last_pos).magnitude
         self.last_pos = cur_pos
 
@@ -277,13 +310,13 @@ class Skeleton:
     def delete(self):
         if not self.deleted:
             self.deleted = True
-            clock.unschedule(self.update)
+            self.level.ticks.remove(self)
             self.head.delete()
             self.body.delete()
 
     def die(self, vel=(0, 0)):
         self.delete()
-        if self.game.use_particles:
+        if self.scene.bones:
             self.scene.bones.emit(
                 10,
                 pos=self.pos,
@@ -294,6 +327,7 @@ class Skeleton:
                 size_spread=1,
                 angle_spread=6,
             )
+        if self.scene.skulls:
             self.scene.skulls.emit(
                 1,
                 pos=self.pos,
@@ -303,7 +337,7 @@ class Skeleton:
                 size=7,
             )
         if random.randrange(10) == 0:
-            BombPowerup(self.level, self.pos)
+            BombPowerup.spawn(self.level, self.pos)
 
 
 class Mage(Skeleton):
@@ -318,14 +352,12 @@ class Mage(Skeleton):
         target = self.level.player
         if not target:
             return
-        aim = Vector2(*target.pos) - pos
+        aim = target.pos - pos
 
-        self.level.objects.append(
-            TimedMagicMissile(
-                self.level,
-                pos,
-                aim.normalize() * MagicMissile.SPEED
-            )
+        TimedMagicMissile.spawn(
+            self.level,
+            pos,
+            aim.scaled(MagicMissile.SPEED)
         )
 
 
@@ -338,12 +370,50 @@ entity_id = 1
 class Entity:
     shape = None
 
+    # These live in the level's EnemyStore, one row per entity.
+    pos = stored_vector('pos')
+    spot_offset = stored_vector('spot_offset')
+    knockback = stored_vector('knockback')
+    radius = stored_value('radius')
+    speed = stored_value('speed')
+    head_to_spot = stored_value('head_to_spot', bool)
+    steers_to_spot = stored_value('steers_to_spot', bool)
+
+    @property
+    def dead(self):
+        return not self._store.alive[self._row]
+
+    @dead.setter
+    def dead(self, v):
+        self._store.alive[self._row] = not v
+
+    @property
+    def row(self):
+        return self._row
+
+    # update every step, however far from the player; see lod.py
+    full_rate = False
+
+    default_radius = 1
+    default_speed = 0
+
+    def __init_subclass__(cls, **kwargs):
+        # Subclasses set radius and speed as plain class attributes,
+        # which would hide the properties above.  Keep them as the
+        # defaults for new rows instead.
+        super().__init_subclass__(**kwargs)
+        for name in ('radius', 'speed'):
+            value = cls.__dict__.get(name)
+            if isinstance(value, (int, float)):
+                setattr(cls, 'default_' + name, value)
+                delattr(cls, name)
+
     def __init__(self, level):
         self.level = level
         self.game = level.game
+        level.enemy_store.add(self, radius=self.default_radius, speed=self.default_speed)
 
         global entity_id
-        self.pos = Vector2D()
         self.id = entity_id
         entity_id += 1
         self.radius_squared = self.radius ** 2
@@ -357,27 +427,36 @@ class Entity:
     def delete(self):
         self.level.enemies.remove(self)
         self.dead = True
+        self.level.enemy_store.remove(self)
         if self.shape:
             self.shape.delete()
 
+    def knock_back(self, velocity):
+        """Add velocity to our knockback; Level.apply_knockback decays it."""
+        self.knockback = self.knockback + velocity
+
 
 class BadGuy(Entity):
     die_on_any_collision = False
 
+    # pick a random spot near the player
+    #
+    # move towards that spot until you get "close enough" to the player,
+    # at which point head directly towards the player.
+    #
+    # until they get "too far" from the player,
+    # at which point start moving towards the spot again.
+    #
+    # Level.steer_enemies moves everybody doing this, all at once.
+    spot_high_watermark = 140
+    spot_low_watermark = 90
+    spot_radius_min = 30
+    spot_radius_max = 70
+
     def init_spot(self):
-        # pick a random spot near the player
-        #
-        # move towards that spot until you get "close enough" to the player,
-        # at which point head directly towards the player.
-        #
-        # until they get "too far" from the player,
-        # at which point start moving towards the spot again.
-        self.spot_high_watermark = 140
-        self.spot_low_watermark = 90
-        self.spot_radius_min = 30
-        self.spot_radius_max = 70
         self.spot_offset = Vector2D(random.randint(self.spot_radius_min, self.spot_radius_max), 0).rotated(random.randint(0, 360))
         self.head_to_spot = True
+        self.steers_to_spot = True
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {self.id} ({repr_float(self.pos.x)}, {repr_float(self.pos.y)})>"
@@ -408,7 +487,6 @@ class BadGuy(Entity):
 
     speed = 1
     radius = 1
-    dead = False
 
     def move_to(self, v):
         # print(f"{time:8}", self, "move to", v)
@@ -418,27 +496,15 @@ class BadGuy(Entity):
         v = self.pos + delta
         self.move_to(v)
 
-    def move_towards_pos(self, pos):
+    def move_towards_pos(self, pos, dt):
+        step = self.speed * (dt * SPEED_FPS)
         delta = pos - self.pos
-        if delta.magnitude > self.speed:
-            delta = delta.scaled(self.speed)
+        if delta.magnitude > step:
+            delta = delta.scaled(step)
         self.move_to(self.pos + delta)
 
-    def move_towards_player(self):
-        return self.move_towards_pos(self.level.player.pos)
-
-    def move_towards_spot(self):
-        player = self.level.player
-        delta = player.pos - self.pos
-        distance_to_player = delta.magnitude
-
-        threshold = self.spot_low_watermark if self.head_to_spot else self.spot_high_watermark
-        self.head_to_spot = distance_to_player > threshold
-
-        pos = player.pos
-        if self.head_to_spot:
-            pos += self.spot_offset
-        self.move_towards_pos(pos)
+    def move_towards_player(self, dt):
+        return self.move_towards_pos(self.level.player.pos, dt)
 
     def push_away_from_entity(self, entity):
         delta = self.pos - entity.pos
@@ -491,9 +557,8 @@ class Stalker(BadGuy):
         super().delete()
 
     def update(self, dt):
-        if self.dead:
-            return
-        self.move_towards_spot()
+        # Level.steer_enemies does our moving
+        pass
 
 
 class Blobby:
@@ -550,7 +615,7 @@ class Blobby:
             self.shape = None
 
     def die(self, vel=Vector2D()):
-        if self.game.use_particles:
+        if self.scene.smoke:
             self.scene.smoke.emit(
                 num=self.radius,
                 pos=self.shape.pos,
@@ -599,17 +664,16 @@ class Splitter(BadGuy):
             super().delete()
 
     def update(self, dt):
-        if self.dead:
-            return
-        self.move_towards_spot()
+        # Level.steer_enemies does our moving
+        pass
 
 
 class Bloblet(BadGuy):
-    _radius = 15
+    default_radius = 15
 
     def __init__(self, level, leader):
         super().__init__(level)
-        self.shape = Blobby(self.game, level.scene, radius=self._radius)
+        self.shape = Blobby(self.game, level.scene, radius=self.default_radius)
         self.radius = 15
 
         if leader:
@@ -619,13 +683,10 @@ class Bloblet(BadGuy):
 
         self.random_placement()
 
-    @property
-    def radius(self):
-        return self._radius
-
-    @radius.setter
+    @Entity.radius.setter
     def radius(self, v):
-        self.shape.radius = self._radius = v
+        Entity.radius.fset(self, v)
+        self.shape.radius = v
 
     def init_leader(self):
         self.leader = None
@@ -672,7 +733,7 @@ class Bloblet(BadGuy):
             # I always move!
             # print("LEADER BLOB MOVING TOWARDS PLAYER", self)
             before = self.pos
-            self.move_towards_player()
+            self.move_towards_player(dt)
             move = self.pos - before
             for b in self.blobs:
                 if b is self:
@@ -686,7 +747,8 @@ class Bloblet(BadGuy):
         # touching any other blobs
         self.move_towards_pos(
             self.leader.pos * 0.9 +
-            self.level.player.pos * 0.1
+            self.level.player.pos * 0.1,
+            dt
         )
 
 
@@ -702,14 +764,16 @@ class Shot(BadGuy):
     speed = 4
     lifetime = 2
     die_on_any_collision = True
+    # shots are quick; saving up dt would have them jump through walls
+    full_rate = True
 
     def __init__(self, shooter):
         super().__init__(shooter.level)
         player = self.level.player
         self.shooter = shooter
-        self.pos = Vector2D(shooter.shape.pos[0], shooter.shape.pos[1])
+        self.pos = shooter.pos
         self.delta = (player.pos - self.pos).scaled(self.speed)
-        self.shape = MagicMissile(self.level, self.pos, self.delta)
+        self.shape = MagicMissile.spawn(self.level, self.pos, self.delta)
         self.expiration_date = self.game.time + self.lifetime
         sounds.enemy_shot.play()
 
@@ -719,14 +783,15 @@ class Shot(BadGuy):
         if self.game.time > self.expiration_date:
             self.on_death()
             return
-        self.move_delta(self.delta)
+        self.move_delta(self.delta * (dt * SPEED_FPS))
 
     def on_collide_shield(self):
         self.remove()
 
     def delete(self):
-        super().delete()
+        # the missile goes back in its pool, so hit it while it's still here
         self.shape.hit()
+        super().delete()
 
 
 class ShooterBase(BadGuy):
@@ -760,7 +825,7 @@ class ShooterBase(BadGuy):
 
 
 class Shooter(ShooterBase):
-    final_speed = ShooterBase.speed
+    final_speed = ShooterBase.default_speed
 
     def __init__(self, level, pos=None, speed_boost=None, period=None):
         super().__init__(level)
@@ -785,12 +850,16 @@ class Shooter(ShooterBase):
 
         self.level.shooters.add(self)
         self._next_shot_time()
-        clock.each_tick(self.smoke)
+        self.level.ticks.add(self, level.lod.throttle(self.look, lambda: self.pos))
 
     SMOKE_RATE = 100
 
-    def smoke(self, dt):
-        if self.game.use_particles:
+    def look(self, dt):
+        """Face the player, trailing smoke."""
+        player = self.level.player
+        if player:
+            self.shape.angle = (player.pos - self.pos).angle()
+        if self.level.scene.smoke:
             self.level.scene.smoke.emit(
                 num=dt * self.SMOKE_RATE,
                 pos=Vector2D(self.shape.pos) - Polar2D(5, self.shape.angle),
@@ -804,8 +873,8 @@ class Shooter(ShooterBase):
 
     def delete(self):
         self.level.shooters.discard(self)
-        clock.unschedule(self.smoke)
-        if self.game.use_particles:
+        self.level.ticks.remove(self)
+        if self.level.scene.skulls:
             self.level.scene.skulls.emit(
                 1,
                 pos=self.pos,
@@ -828,9 +897,7 @@ class Shooter(ShooterBase):
                 ratio = (self.period - elapsed) / self.period
                 current_speed = self.final_speed + ((self.initial_speed - self.final_speed) * ratio)
                 self.speed = current_speed
-        player = self.level.player
-        self.shape.angle = Vector2D(player.pos - self.shape.pos).angle()
-        self.move_towards_spot()
+        # Level.steer_enemies does our moving, and look() our turning
 
 
 class Spawner(ShooterBase):
@@ -860,7 +927,7 @@ class Spawner(ShooterBase):
 
         self._next_shot_time()
         self.t = random.uniform(0, 6)
-        clock.each_tick(self.bob)
+        self.level.ticks.add(self, level.lod.throttle(self.bob, lambda: self.pos))
 
     def bob(self, dt):
         self.t += dt
@@ -870,7 +937,7 @@ class Spawner(ShooterBase):
 
     def delete(self):
         Gib.shower(self.level, self.pos, 12)
-        clock.unschedule(self.bob)
+        self.level.ticks.remove(self)
         super().delete()
 
     def die(self, v):
@@ -887,7 +954,7 @@ class Spawner(ShooterBase):
         return shooter
 
     def move(self, dt):
-        self.move_towards_pos(self.final_position)
+        self.move_towards_pos(self.final_position, dt)
 
 
 class Prince(Entity):
@@ -934,6 +1001,7 @@ class Prince(Entity):
 
     def delete(self):
         self.level.enemies.remove(self)
+        self.level.enemy_store.remove(self)
         self.delete_shape()
 
     def die(self):
@@ -946,6 +1014,9 @@ class Prince(Entity):
     def move_delta(self, d):
         pass
 
+    def knock_back(self, velocity):
+        pass
+
     HEART_RATE = 1
 
     def update(self, dt):
@@ -0,0 +1,231 @@
+"""Keep particle effects within what the machine can draw.
+
+The scene's particle groups (scene.smoke, scene.sparks, scene.bones
+and scene.skulls) are each wrapped in a GovernedGroup.  The
+ParticleGovernor watches how long frames take, and when they run over
+budget it lowers a quality level, which scales down how many particles
+each group emits.  Groups fade at different rates, so the smoke thins
+out long before the skulls stop flying.  When frames are comfortably
+quick again, quality creeps back up.
+
+On top of that, there's a cap on the number of particles alive at
+once, across all the groups.
+
+Emitting doesn't reach wasabi2d straight away.  Each group collects
+the frame's emissions and Level.larry_update flushes them at the end
+of the step, as one emit per group and color, with an array of
+positions, velocities and so on, one row per particle.
+
+Running with --no-particles makes every group a NullParticleGroup,
+which is falsy, so emitters can skip working out what they would have
+emitted:
+
+    if self.scene.smoke:
+        self.scene.smoke.emit(...)
+"""
+import math
+import random
+from collections import deque
+
+import numpy as np
+
+from .engine import clock
+
+
+# How quickly each group fades as quality drops: a group emits
+# quality ** weight of its particles.
+WEIGHTS = {
+    'smoke': 2.0,
+    'sparks': 1.0,
+    'bones': 0.5,
+    'skulls': 0.25,
+}
+
+
+# The per-particle parameters of ParticleGroup.emit(), and their defaults.
+# pos and vel are vectors, the rest are scalars.
+VECTOR_PARAMS = {
+    'pos': (0.0, 0.0),
+    'vel': (0.0, 0.0),
+}
+SCALAR_PARAMS = {
+    'pos_spread': 0.0,
+    'vel_spread': 0.0,
+    'size': 1.0,
+    'size_spread': 0.0,
+    'spin': 0.0,
+    'spin_spread': 0.0,
+    'angle': 0.0,
+    'angle_spread': 0.0,
+}
+# spreads of vector parameters need a column per particle
+VECTOR_SPREADS = ('pos_spread', 'vel_spread')
+
+
+def color_key(color):
+    """A hashable version of color, for grouping emissions."""
+    if color is None or isinstance(color, str):
+        return color
+    return tuple(float(c) for c in color)
+
+
+class NullParticleGroup:
+    """A particle group that's switched off."""
+
+    scale = 0.0
+
+    def __bool__(self):
+        return False
+
+    def emit(self, num, **kwargs):
+        pass
+
+    def flush(self):
+        pass
+
+
+class GovernedGroup:
+    """A particle group whose emissions are scaled by the governor."""
+
+    def __init__(self, governor, name, group, max_age):
+        self.governor = governor
+        self.name = name
+        self.group = group
+        self.max_age = max_age
+        self.weight = WEIGHTS.get(name, 1.0)
+        self.scale = 1.0
+        # (time of death, count) for each emission still alive
+        self.emissions = deque()
+        self._live = 0
+        # emissions waiting for flush(): {color: [(num, params), ...]}
+        self.pending = {}
+
+    def __getattr__(self, name):
+        return getattr(self.group, name)
+
+    @property
+    def live(self):
+        """Roughly how many of this group's particles are alive."""
+        now = clock.t
+        emissions = self.emissions
+        while emissions and emissions[0][0] <= now:
+            self._live -= emissions.popleft()[1]
+        return self._live
+
+    def emit(self, num, *, color=None, **params):
+        """Emit num particles, at the end of the step."""
+        num = round(self.governor.allow(self, num))
+        if not num:
+            return
+        # sprite positions are views that keep changing; copy them
+        for name in VECTOR_PARAMS:
+            if name in params:
+                x, y = params[name]
+                params[name] = (float(x), float(y))
+        self.pending.setdefault(color_key(color), []).append((num, params))
+        self.emissions.append((clock.t + self.max_age, num))
+        self._live += num
+
+    def flush(self):
+        """Emit everything collected since the last flush."""
+        pending = self.pending
+        if not pending:
+            return
+        self.pending = {}
+        for color, requests in pending.items():
+            if color is not None:
+                colored = {'color': color}
+            else:
+                colored = {}
+            if len(requests) == 1:
+                num, params = requests[0]
+                self.group.emit(num, **params, **colored)
+                continue
+
+            counts = [num for num, _ in requests]
+            total = sum(counts)
+            batch = {}
+            for name, default in VECTOR_PARAMS.items():
+                values = [params.get(name, default) for _, params in requests]
+                batch[name] = np.repeat(values, counts, axis=0)
+            for name, default in SCALAR_PARAMS.items():
+                values = [params.get(name, default) for _, params in requests]
+                if values.count(values[0]) == len(values):
+                    batch[name] = values[0]
+                    continue
+                column = np.repeat(values, counts)
+                if name in VECTOR_SPREADS:
+                    column = column[:, np.newaxis]
+                batch[name] = column
+            self.group.emit(total, **batch, **colored)
+
+
+class ParticleGovernor:
+    """Scales particle emission to keep frames inside budget seconds.
+
+    Frame times are smoothed (SMOOTHING is the weight of each new
+    frame).  Over budget, quality falls at FALL_RATE per second; under
+    RECOVER_AT of budget, it rises at RISE_RATE per second.  It never
+    drops below MIN_QUALITY.  At most cap particles are alive at once.
+    """
+
+    SMOOTHING = 0.1
+    FALL_RATE = 0.5
+    RISE_RATE = 0.05
+    RECOVER_AT = 0.9
+    MIN_QUALITY = 0.05
+
+    def __init__(self, budget=1 / 50, cap=4000):
+        self.budget = budget
+        self.cap = cap
+        self.quality = 1.0
+        self.frame_time = 0.0
+        self.groups = {}
+        # for rounding fractional emissions.  Note that particle groups
+        # draw from np.random for every particle they emit, as the game
+        # does, so changes in quality still change the game's random
+        # numbers; replays rely on quality changing the same way.
+        self.random = random.Random(0)
+
+    def govern(self, name, group, max_age):
+        """Wrap group, the particle group called name, for the governor."""
+        governed = self.groups[name] = GovernedGroup(self, name, group, max_age)
+        governed.scale = self.quality ** governed.weight
+        return governed
+
+    @property
+    def live(self):
+        return sum(group.live for group in self.groups.values())
+
+    def flush(self):
+        """Send the step's emissions on to the particle groups."""
+        for group in self.groups.values():
+            group.flush()
+
+    def observe(self, dt):
+        """Note that the last frame took dt seconds."""
+        if not self.frame_time:
+            self.frame_time = dt
+        self.frame_time += (dt - self.frame_time) * self.SMOOTHING
+
+        quality = self.quality
+        if self.frame_time > self.budget:
+            quality = max(quality - self.FALL_RATE * dt, self.MIN_QUALITY)
+        elif self.frame_time < self.budget * self.RECOVER_AT:
+            quality = min(quality + self.RISE_RATE * dt, 1.0)
+        if quality != self.quality:
+            self.quality = quality
+            for group in self.groups.values():
+                group.scale = quality ** group.weight
+
+    def allow(self, group, num):
+        """How many of num particles group may emit."""
+        if group.scale < 1.0:
+            num *= group.scale
+            fraction, whole = math.modf(num)
+            num = int(whole) + (self.random.random() < fraction)
+
+        room = self.cap - self.live
+        if num > room:
+            num = max(room, 0)
+        return num
@@ -0,0 +1,66 @@
+"""Pools of reusable, sprite-backed objects.
+
+Short-lived effects--magic missiles, gibs, bomb powerups--are made and
+thrown away by the dozen in a fight.  Rather than create a sprite for
+each one and delete it a second later, a level keeps a Pool of each
+kind: deleting one parks its sprite off screen and puts it back in the
+pool, and the next one made takes it out again.
+
+A pooled class has:
+
+    __init__(level, *args)  creates the sprite, then calls activate(*args)
+    activate(*args)         puts it back in play, as if newly created
+    deactivate()            takes it out of play and parks its sprite
+
+and is made with Class.spawn(level, *args) rather than Class(level, *args).
+Its delete() should call deactivate() and then level.pool(Class).release(self).
+
+Pools belong to a level, as the level's layers (and so the sprites)
+are cleared when it ends.
+"""
+
+
+# where sprites wait while their object is in the pool
+PARKED = (-1000, -1000)
+
+
+class Pool:
+    def __init__(self, cls, level):
+        self.cls = cls
+        self.level = level
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, *args):
+        """Return an active object, reused if there's one free."""
+        if self.free:
+            self.hits += 1
+            obj = self.free.pop()
+            obj.activate(*args)
+            return obj
+        self.misses += 1
+        return self.cls(self.level, *args)
+
+    def release(self, obj):
+        """Put a deactivated object back in the pool."""
+        self.free.append(obj)
+
+    @property
+    def hit_rate(self):
+        acquired = self.hits + self.misses
+        return self.hits / acquired if acquired else 0.0
+
+    def __repr__(self):
+        return (
+            f"<Pool {self.cls.__name__}: {self.hit_rate:.0%} hits "
+            f"({self.hits}/{self.hits + self.misses}), {len(self.free)} free>"
+        )
+
+
+class Pooled:
+    """Mixin for pooled classes, giving them spawn()."""
+
+    @classmethod
+    def spawn(cls, level, *args):
+        return level.pool(cls).acquire(*args)
@@ -0,0 +1,164 @@
+"""Record a run of the game, to replay it later exactly.
+
+Run the game with --record FILE and it saves everything the
+simulation can't work out for itself: the random seed, which level
+and options it started with, and for every frame, the frame's dt and
+the Inputs (see control.py).  Replay it with
+
+    python3 -m ascend.replay FILE
+
+which runs the very same frames again, headless and as fast as it can.
+
+Each frame also saves where the player was at the end of it, so a
+replay can tell if it has drifted from the original run.
+
+The file is gzipped: a JSON header line, then one FRAME record per
+frame.
+"""
+import atexit
+import gzip
+import json
+import math
+import os
+import random
+import struct
+
+import numpy as np
+
+from .control import Inputs, RECORDED_KEYS
+
+
+MAGIC = "roller knight recording"
+VERSION = 1
+
+# dt, pressed, buttons, flags, hat x, hat y, axis x, axis y, player x, player y
+FRAME = struct.Struct('<dHBBbbdddd')
+
+# flags
+STICK = 1
+HAT = 2
+AXES = 4
+
+
+def seed_rngs(seed):
+    """Seed both random and NumPy's random."""
+    random.seed(seed)
+    np.random.seed(seed & 0xffffffff)
+
+
+def new_seed():
+    return int.from_bytes(os.urandom(4), 'little')
+
+
+def player_pos(level):
+    """Where the player is, as a tuple of two floats (NaN if there's none)."""
+    player = level and level.player
+    if not player:
+        return math.nan, math.nan
+    x, y = player.pos
+    return float(x), float(y)
+
+
+def pack_frame(dt, inputs, pos):
+    flags = 0
+    if inputs.stick:
+        flags |= STICK
+    hat_x = hat_y = 0
+    if inputs.hat is not None:
+        flags |= HAT
+        hat_x, hat_y = inputs.hat
+    axis_x = axis_y = 0.0
+    if inputs.axes is not None:
+        flags |= AXES
+        axis_x, axis_y = inputs.axes
+    return FRAME.pack(
+        dt, inputs.pressed, inputs.buttons, flags,
+        hat_x, hat_y, axis_x, axis_y, *pos
+    )
+
+
+def unpack_frame(data):
+    """Return (dt, inputs, player pos) from a packed frame."""
+    dt, pressed, buttons, flags, hat_x, hat_y, axis_x, axis_y, x, y = FRAME.unpack(data)
+    inputs = Inputs(
+        pressed,
+        buttons,
+        stick=bool(flags & STICK),
+        hat=(hat_x, hat_y) if flags & HAT else None,
+        axes=(axis_x, axis_y) if flags & AXES else None,
+    )
+    return dt, inputs, (x, y)
+
+
+class Recorder:
+    """Write a recording as the game runs.
+
+    Create it before anything uses random numbers: it reseeds them.
+    Call frame() after every frame.  The file is closed on exit.
+    """
+
+    def __init__(self, path, *, gametype, level, use_particles):
+        self.path = path
+        self.seed = new_seed()
+        seed_rngs(self.seed)
+        self.frames = 0
+
+        self.file = gzip.open(path, 'wb')
+        header = {
+            'magic': MAGIC,
+            'version': VERSION,
+            'seed': self.seed,
+            'gametype': gametype,
+            'level': level,
+            'use_particles': use_particles,
+            'keys': [key.name for key in RECORDED_KEYS],
+        }
+        self.file.write(json.dumps(header).encode('utf8') + b'\n')
+        atexit.register(self.close)
+        print(f"[INFO] Recording to {path} (seed {self.seed}).")
+
+    def frame(self, dt, inputs, level):
+        self.file.write(pack_frame(dt, inputs, player_pos(level)))
+        self.frames += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            print(f"[INFO] Recorded {self.frames} frames to {self.path}.")
+
+
+class Recording:
+    """A recording, loaded back in.
+
+    frames is a list of (dt, inputs, player pos) tuples.
+    """
+
+    def __init__(self, path):
+        with gzip.open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('magic') != MAGIC:
+                raise ValueError(f"{path} isn't a recording")
+            if header['version'] != VERSION:
+                raise ValueError(f"{path} is recording version {header['version']}, not {VERSION}")
+            if header['keys'] != [key.name for key in RECORDED_KEYS]:
+                raise ValueError(f"{path} was recorded with different keys")
+            data = f.read()
+
+        self.seed = header['seed']
+        self.gametype = header['gametype']
+        self.level = header['level']
+        self.use_particles = header['use_particles']
+        self.frames = [
+            unpack_frame(data[i:i + FRAME.size])
+            for i in range(0, len(data) - FRAME.size + 1, FRAME.size)
+        ]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def argv(self):
+        """The command line the recorded game saw, for Game()."""
+        argv = ['replay', self.level]
+        if not self.use_particles:
+            argv.append('--no-particles')
+        return argv
@@ -0,0 +1,113 @@
+"""Replay a recording made with --record, headless and as fast as possible.
+
+    python3 -m ascend.replay FILE [--profile START:END] [--slowest N]
+                                  [--timings] [--timings-file FILE]
+
+Every frame goes through the same code as when it was recorded, with
+the same dt and inputs, so a frame that was slow when the game was
+played can be replayed, timed and profiled at leisure.  --profile runs
+cProfile over just the frames from START up to (not including) END.
+--timings and --timings-file time each step's phases, as they do for
+the game (see frametimer.py).
+
+The replay stops with an error if the player ends a frame somewhere
+other than where they were in the recording.
+"""
+import argparse
+import cProfile
+import math
+import os
+import pstats
+import sys
+import time
+
+os.environ['ASCEND_HEADLESS'] = '1'
+
+from .engine import clock
+from . import control
+from .game import Game
+from .recording import Recording, player_pos, seed_rngs
+from .settings import load_settings
+
+
+def frame_range(s):
+    start, colon, end = s.partition(':')
+    if not colon:
+        raise argparse.ArgumentTypeError("expected START:END")
+    return int(start or 0), int(end) if end else None
+
+
+def same_pos(a, b):
+    return all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(a, b))
+
+
+def replay(recording, profile=None, options=()):
+    """Replay recording.  Returns the time each frame took.
+
+    options are extra command line options for the Game.
+    """
+    settings = load_settings()
+    control.init_controls(settings)
+
+    seed_rngs(recording.seed)
+    game = Game(settings, recording.gametype, argv=recording.argv() + list(options))
+    game.new()
+
+    profiler = cProfile.Profile()
+    start, end = profile or (None, None)
+    timings = []
+    perf_counter = time.perf_counter
+    for i, (dt, inputs, pos) in enumerate(recording.frames):
+        if i == start:
+            profiler.enable()
+        elif i == end:
+            profiler.disable()
+
+        t = perf_counter()
+        clock.tick(dt)
+        game.advance(dt, inputs)
+        timings.append(perf_counter() - t)
+
+        replayed = player_pos(game.level)
+        if not same_pos(replayed, pos):
+            sys.exit(
+                f"[ERROR] Replay went out of sync at frame {i}: "
+                f"player at {replayed}, recorded at {pos}."
+            )
+    profiler.disable()
+
+    if profile:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m ascend.replay', description=__doc__.split('\n')[0])
+    parser.add_argument('path', help="a recording made with --record")
+    parser.add_argument('--profile', type=frame_range, metavar='START:END', help="profile these frames")
+    parser.add_argument('--slowest', type=int, default=10, metavar='N', help="list the N slowest frames")
+    parser.add_argument('--timings', action='store_true', help="time each step's phases")
+    parser.add_argument('--timings-file', metavar='FILE', help="write each step's timings to FILE")
+    args = parser.parse_args()
+
+    options = []
+    if args.timings:
+        options.append('--timings')
+    if args.timings_file:
+        options += ['--timings-file', args.timings_file]
+
+    recording = Recording(args.path)
+    print(f"[INFO] Replaying {len(recording)} frames of {recording.level!r} (seed {recording.seed}).")
+    timings = replay(recording, args.profile, options)
+
+    total = sum(timings)
+    recorded = sum(dt for dt, _, _ in recording.frames)
+    print(f"[INFO] Replayed {recorded:.1f}s of play in {total:.2f}s ({total / max(len(timings), 1) * 1000:.3f} ms/frame).")
+    print(f"{'frame':>8} {'replay ms':>10} {'recorded ms':>12}")
+    slowest = sorted(range(len(timings)), key=timings.__getitem__, reverse=True)
+    for i in sorted(slowest[:args.slowest]):
+        print(f"{i:>8} {timings[i] * 1000:>10.3f} {recording.frames[i][0] * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
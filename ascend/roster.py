@@ -0,0 +1,90 @@
+"""A level's collections of things that come and go: enemies and objects.
+
+Things get deleted all through a step--an enemy dies when the player
+hits it, a magic missile when it hits a wall--usually while something
+is looping over the very collection they are in.  A Roster makes that
+safe and cheap:
+
+* remove() doesn't take anything out straight away.  It marks it as
+  leaving, which is O(1), and iterating, len() and `in` skip it from
+  then on.
+* flush() takes out everything marked, each by swapping it with the
+  last item and popping that, again O(1).  Level.larry_update calls it
+  once at the end of each step (see Level.remove_deleted); nothing may
+  be iterating over the roster at the time.
+* append() during iteration is fine; the new item is visited by loops
+  already under way, as with a list.
+
+So order isn't kept: flushing moves the last item into the gap.
+
+Appending something that is leaving--a pooled object deleted and
+reused in the same step--just cancels its removal.
+"""
+
+
+class Roster:
+    def __init__(self):
+        self.items = []
+        # id(item) -> its index in items
+        self.index = {}
+        # ids of items waiting for flush() to take them out
+        self.leaving = set()
+
+    def append(self, item):
+        key = id(item)
+        if key in self.index:
+            if key not in self.leaving:
+                raise ValueError(f"{item!r} is already in the roster")
+            self.leaving.discard(key)
+            return
+        self.index[key] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        """Mark item to be taken out at the next flush()."""
+        key = id(item)
+        if key not in self.index or key in self.leaving:
+            raise ValueError(f"{item!r} is not in the roster")
+        self.leaving.add(key)
+
+    def flush(self):
+        """Take out everything removed since the last flush."""
+        leaving = self.leaving
+        if not leaving:
+            return
+        items = self.items
+        index = self.index
+        # highest index first: the set's order depends on memory
+        # addresses, and the order items end up in has to be the same
+        # every run, or replays go out of sync
+        for i in sorted((index.pop(key) for key in leaving), reverse=True):
+            last = items.pop()
+            if i < len(items):
+                items[i] = last
+                index[id(last)] = i
+        leaving.clear()
+
+    def clear(self):
+        self.items.clear()
+        self.index.clear()
+        self.leaving.clear()
+
+    def __iter__(self):
+        # checked item by item, so removals made during the loop count too
+        leaving = self.leaving
+        for item in self.items:
+            if not leaving or id(item) not in leaving:
+                yield item
+
+    def __len__(self):
+        return len(self.items) - len(self.leaving)
+
+    def __bool__(self):
+        return len(self.items) > len(self.leaving)
+
+    def __contains__(self, item):
+        key = id(item)
+        return key in self.index and key not in self.leaving
+
+    def __repr__(self):
+        return f"Roster({list(self)!r})"
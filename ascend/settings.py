@@ -9,6 +9,10 @@ rcfile_schema = {
     'hat': 0,
     'move x axis': 0,
     'move y axis': 1,
+    'frame timings': 0,
+    'frame timings file': (None, str),
+    'particle budget ms': 20,
+    'particle cap': 4000,
 }
 
 if hasattr(os, "getwindowsversion"):
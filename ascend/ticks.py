@@ -0,0 +1,68 @@
+import time
+
+
+class TickRegistry:
+    """Per-frame callbacks, owned by a level.
+
+    Replaces clock.each_tick() for things that animate themselves every
+    frame.  Callbacks are grouped by kind (by default the owner's class
+    name) and tick() runs each kind in one pass, kinds in the order they
+    were first registered.
+
+    Entries are keyed by their owner, so remove(owner) always takes out
+    whatever that owner registered, and an owner removed partway through
+    a pass (say, killed by something ticked before it) isn't ticked.
+
+    timings and calls hold the time spent in, and the number of calls
+    to, each kind since the last reset_counters().
+    """
+
+    def __init__(self):
+        self.kinds = {}
+        self.owners = {}
+        self.timings = {}
+        self.calls = {}
+
+    def __len__(self):
+        return len(self.owners)
+
+    def __contains__(self, owner):
+        return owner in self.owners
+
+    def add(self, owner, callback, kind=None):
+        """Call callback(dt) every frame until remove(owner)."""
+        if owner in self.owners:
+            self.remove(owner)
+        kind = kind or owner.__class__.__name__
+        entries = self.kinds.get(kind)
+        if entries is None:
+            entries = self.kinds[kind] = {}
+            self.timings[kind] = 0.0
+            self.calls[kind] = 0
+        entries[owner] = callback
+        self.owners[owner] = kind
+
+    def remove(self, owner):
+        """Stop ticking owner.  Harmless if it isn't registered."""
+        kind = self.owners.pop(owner, None)
+        if kind is not None:
+            del self.kinds[kind][owner]
+
+    def tick(self, dt):
+        perf_counter = time.perf_counter
+        for kind, entries in tuple(self.kinds.items()):
+            if not entries:
+                continue
+            start = perf_counter()
+            calls = 0
+            for owner, callback in tuple(entries.items()):
+                if owner in entries:
+                    callback(dt)
+                    calls += 1
+            self.timings[kind] += perf_counter() - start
+            self.calls[kind] += calls
+
+    def reset_counters(self):
+        for kind in self.timings:
+            self.timings[kind] = 0.0
+            self.calls[kind] = 0
@@ -20,12 +20,42 @@ ROT90 = np.array([
 ])
 
 
+class CompiledPolygon:
+    """Collision geometry for a convex polygon, computed once.
+
+    points is a (k, 2) array of vertices, edges the (k, 2) array of
+    vectors from each vertex to the next, across the (k, 2) array of
+    edge normals (pointing into the polygon), and offs the (k, 1)
+    array of each edge's offset along its normal.
+    """
+    __slots__ = 'points', 'edges', 'across', 'offs'
+
+    def __init__(self, poly):
+        points = np.array(poly, dtype=float)
+        edges = np.diff(points, axis=0, append=points[[0]])
+        alongs = normalize(edges)
+        across = alongs @ ROT90
+        self.points = points
+        self.edges = edges
+        self.across = across
+        self.offs = dot(across, points)
+
+
+def compile_polygon(poly):
+    if isinstance(poly, CompiledPolygon):
+        return poly
+    return CompiledPolygon(poly)
+
+
 def polygon_collision(poly, circle_pos, circle_radius):
-    points = np.array(poly)
-    alongs = normalize(np.diff(points, axis=0, append=points[[0]]))
-    across = alongs @ ROT90
-    offs = dot(across, points)
-    depths = dot(across, circle_pos) - offs + circle_radius
+    return compiled_polygon_collision(compile_polygon(poly), circle_pos, circle_radius)
+
+
+def compiled_polygon_collision(compiled, circle_pos, circle_radius):
+    points = compiled.points
+    across = compiled.across
+    circle_pos = np.array((circle_pos[0], circle_pos[1]), dtype=float)
+    depths = dot(across, circle_pos) - compiled.offs + circle_radius
     if np.any(depths < 0):
         return None
 
@@ -50,3 +80,184 @@ def polygon_collision(poly, circle_pos, circle_radius):
             return Vector2D(*to_corner * (circle_radius - dists[closest]))
 
     return pen
+
+
+def swept_polygon_collision(compiled, start, motion, circle_radius):
+    """Sweep a circle from start along motion against a convex polygon.
+
+    Returns (t, normal) for the first contact, where t is the fraction
+    of motion travelled (0 <= t <= 1) and normal is a unit ndarray
+    pointing out of the polygon at the point of contact.  Returns None
+    if the circle doesn't touch the polygon along the way, or if it's
+    already touching at start--compiled_polygon_collision() handles that.
+    """
+    points = compiled.points
+    s = np.array((start[0], start[1]), dtype=float)
+    m = np.array((motion[0], motion[1]), dtype=float)
+    r = circle_radius
+
+    depths = dot(compiled.across, s)[:, 0] - compiled.offs[:, 0] + r
+    if np.all(depths >= 0):
+        # starting inside the polygon's slabs; leave it to the discrete test
+        if compiled_polygon_collision(compiled, s, r) is not None:
+            return None
+
+    best_t = np.inf
+    best_normal = None
+
+    # the circle touching an edge's line, within the edge's length
+    closing = dot(compiled.across, m)[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ts = -depths / closing
+    candidates = (depths < 0) & (closing > 0) & (ts <= 1)
+    for i in np.flatnonzero(candidates):
+        t = ts[i]
+        edge = compiled.edges[i]
+        u = np.dot(s + m * t - points[i], edge) / np.dot(edge, edge)
+        if 0 <= u <= 1 and t < best_t:
+            best_t = t
+            best_normal = -compiled.across[i]
+
+    # the circle touching a vertex
+    a = np.dot(m, m)
+    if a:
+        rel = s - points
+        b = 2 * (rel @ m)
+        c = np.sum(rel * rel, axis=1) - r * r
+        disc = b * b - 4 * a * c
+        candidates = (c > 0) & (b < 0) & (disc >= 0)
+        if np.any(candidates):
+            ts = np.full(len(points), np.inf)
+            ts[candidates] = (-b[candidates] - np.sqrt(disc[candidates])) / (2 * a)
+            i = np.argmin(ts)
+            if ts[i] <= 1 and ts[i] < best_t:
+                best_t = ts[i]
+                best_normal = (s + m * best_t - points[i]) / r
+
+    if best_normal is None:
+        return None
+    return float(best_t), best_normal
+
+
+def convex_hull(points):
+    """Return the convex hull of a small set of points.
+
+    Vertices come back wound the same way as the wall polygons
+    (positive signed area), as polygon_collision expects.
+    """
+    points = sorted(set((float(x), float(y)) for x, y in points))
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+class PolygonSet:
+    """A batch of convex polygons packed into padded arrays.
+
+    Polygons with fewer than the most vertices are padded out;
+    valid marks which (polygon, vertex) slots are real.
+    lower and upper are each polygon's bounding box.
+    """
+
+    def __init__(self, polygons):
+        compiled = [compile_polygon(poly) for poly in polygons]
+        count = len(compiled)
+        width = max((len(c.points) for c in compiled), default=0)
+
+        self.points = np.zeros((count, width, 2))
+        self.across = np.zeros((count, width, 2))
+        self.offs = np.zeros((count, width))
+        self.valid = np.zeros((count, width), dtype=bool)
+        for i, c in enumerate(compiled):
+            k = len(c.points)
+            self.points[i, :k] = c.points
+            self.across[i, :k] = c.across
+            self.offs[i, :k] = c.offs[:, 0]
+            self.valid[i, :k] = True
+
+        self.lower = np.array([c.points.min(axis=0) for c in compiled]).reshape(count, 2)
+        self.upper = np.array([c.points.max(axis=0) for c in compiled]).reshape(count, 2)
+
+    def __len__(self):
+        return len(self.points)
+
+
+def circles_polygons_collision(polygons, circle_pos, circle_radius):
+    """Collide N circles against every polygon in a PolygonSet at once.
+
+    circle_pos is an (N, 2) array of centres, circle_radius an (N,)
+    array (or a scalar).  Returns an (N, 2) array holding, for each
+    circle, the sum of the penetration vectors polygon_collision()
+    would return against each polygon; rows are zero for circles that
+    touch nothing.
+    """
+    centers = np.asarray(circle_pos, dtype=float).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(circle_radius, dtype=float), (len(centers),))
+    result = np.zeros_like(centers)
+    if not (len(centers) and len(polygons)):
+        return result
+
+    # broadphase: circle bounds vs polygon bounds
+    r = radii[:, np.newaxis]
+    overlaps = (
+        (centers[:, np.newaxis, 0] + r >= polygons.lower[np.newaxis, :, 0])
+        & (centers[:, np.newaxis, 0] - r <= polygons.upper[np.newaxis, :, 0])
+        & (centers[:, np.newaxis, 1] + r >= polygons.lower[np.newaxis, :, 1])
+        & (centers[:, np.newaxis, 1] - r <= polygons.upper[np.newaxis, :, 1])
+        )
+    ci, pi = np.nonzero(overlaps)
+    if not len(ci):
+        return result
+
+    # narrowphase: the same tests as compiled_polygon_collision,
+    # one row per (circle, polygon) pair.
+    c = centers[ci]
+    r = radii[ci]
+    points = polygons.points[pi]
+    across = polygons.across[pi]
+    valid = polygons.valid[pi]
+
+    depths = (
+        across[:, :, 0] * c[:, np.newaxis, 0]
+        + across[:, :, 1] * c[:, np.newaxis, 1]
+        ) - polygons.offs[pi] + r[:, np.newaxis]
+    depths = np.where(valid, depths, np.inf)
+    hit = np.all(depths >= 0, axis=1)
+
+    rows = np.arange(len(ci))
+    pen_edge = np.argmin(depths, axis=1)
+    pen = across[rows, pen_edge] * depths[rows, pen_edge][:, np.newaxis]
+
+    relpts = points - c[:, np.newaxis, :]
+    dists = np.where(valid, np.hypot(relpts[:, :, 0], relpts[:, :, 1]), np.inf)
+    closest = np.argmin(dists, axis=1)
+    close_dist = dists[rows, closest]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_corner = relpts[rows, closest] / close_dist[:, np.newaxis]
+    proj = relpts[:, :, 0] * to_corner[:, np.newaxis, 0] + relpts[:, :, 1] * to_corner[:, np.newaxis, 1]
+    proj = np.where(valid, proj, np.inf)
+    corner_dist = proj[rows, closest]
+
+    # mirrors the vertex-region test in compiled_polygon_collision
+    corner_case = (close_dist >= 1e-5) & np.all(proj >= closest[:, np.newaxis] - 1e-5, axis=1)
+    hit &= ~(corner_case & (corner_dist > r))
+    corner_pen = to_corner * (r - corner_dist)[:, np.newaxis]
+    pen = np.where(corner_case[:, np.newaxis], corner_pen, pen)
+
+    np.add.at(result, ci[hit], pen[hit])
+    return result
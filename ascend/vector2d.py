@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from math import sin, cos, atan2, sqrt, pi, tau
 
+import numpy as np
+
 
 def angle_diff(a, b):
     """Subtract angle b from angle a.
@@ -30,25 +32,37 @@ class Vector2D:
 
     def __init__(self, x=None, y=None):
         if y is None:
-            if isinstance(x, Polar2D):
+            if isinstance(x, Vector2D):
+                y = x.y
+                x = x.x
+            elif isinstance(x, Polar2D):
                 r = x.r
                 theta = x.theta
                 x = cos(theta) * r
                 y = sin(theta) * r
-            elif isinstance(x, self.__class__):
-                y = x.y
-                x = x.x
             elif x is None:
                 x = y = 0
             else:
-                x, y = x
+                y = x[1]
+                x = x[0]
+        self.x = x
+        self.y = y
         self.__magnitude = self.__magnitude_squared = None
-        object.__setattr__(self, 'x', x)
-        object.__setattr__(self, 'y', y)
+
+    @classmethod
+    def from_pos(cls, obj):
+        """The position of a sprite (or anything else with a .pos)."""
+        pos = obj.pos
+        return cls(pos[0], pos[1])
 
     def __repr__(self):
         return f"<{self.__class__.__name__} ({repr_float(self.x)}, {repr_float(self.y)})>"
 
+    def __array__(self, dtype=None, copy=None):
+        # lets NumPy (and so wasabi2d sprite positions) take a
+        # Vector2D directly, without going through __getitem__
+        return np.array((self.x, self.y), dtype=dtype)
+
     def __getitem__(self, index):
         if index == 0:
             return self.x
@@ -60,43 +74,74 @@ class Vector2D:
         return 2
 
     def __iter__(self):
-        yield self.x
-        yield self.y
+        return iter((self.x, self.y))
 
     def __neg__(self):
         return self.__class__(-self.x, -self.y)
 
-    def __add__(self, other):
+    @staticmethod
+    def _xy(other):
+        # Vector2D is by far the most common case, so test it first;
+        # anything else indexable (tuples, numpy arrays, wasabi2d
+        # Vector2) is read by index rather than by iterating.
+        if isinstance(other, Vector2D):
+            return other.x, other.y
         if isinstance(other, Polar2D):
-            other = self.__class__(other)
-            x = other.x
-            y = other.y
-        elif hasattr(other, '__getitem__'):
-            x, y = other
-        else:
-            x = y = other
+            r = other.r
+            theta = other.theta
+            return cos(theta) * r, sin(theta) * r
+        if hasattr(other, '__getitem__'):
+            return other[0], other[1]
+        return other, other
+
+    def __add__(self, other):
+        if isinstance(other, Vector2D):
+            return self.__class__(self.x + other.x, self.y + other.y)
+        if isinstance(other, Vector2DArray):
+            return NotImplemented
+        x, y = self._xy(other)
         return self.__class__(self.x + x, self.y + y)
 
     __radd__ = __add__
 
     def __sub__(self, other):
-        if isinstance(other, Polar2D):
-            other = self.__class__(other)
-            x = other.x
-            y = other.y
-        elif hasattr(other, '__getitem__'):
-            x, y = other
-        else:
-            x = y = other
+        if isinstance(other, Vector2D):
+            return self.__class__(self.x - other.x, self.y - other.y)
+        if isinstance(other, Vector2DArray):
+            return NotImplemented
+        x, y = self._xy(other)
         return self.__class__(self.x - x, self.y - y)
 
+    # In-place arithmetic, for accumulators in hot loops.
+    # These change the vector for everybody holding a reference to it,
+    # which is why += and friends don't use them.
+
+    def iadd(self, other):
+        x, y = self._xy(other)
+        self.x += x
+        self.y += y
+        self.__magnitude = self.__magnitude_squared = None
+        return self
+
+    def isub(self, other):
+        x, y = self._xy(other)
+        self.x -= x
+        self.y -= y
+        self.__magnitude = self.__magnitude_squared = None
+        return self
+
+    def imul(self, other):
+        self.x *= other
+        self.y *= other
+        self.__magnitude = self.__magnitude_squared = None
+        return self
+
     def __bool__(self):
         return bool(self.x or self.y)
 
     def dot(self, other):
-        if not isinstance(other, Vector2D):
-            other = self.__class__(other)
-        return sqrt(self.magnitude_squared + other.magnitude_squared) * cos(Polar2D(self).theta - Polar2D(other).theta)
+        x, y = self._xy(other)
+        return self.x * x + self.y * y
 
     def __mul__(self, other):
         if not isinstance(other, (int, float)):
@@ -142,13 +187,26 @@ class Vector2D:
         return self * (scale / self.magnitude)
 
     def rotated(self, theta):
-        polar = Polar2D(self)
-        polar2 = Polar2D(polar.r, polar.theta + theta)
-        return self.__class__(polar2)
+        return self.rotated_by(cos(theta), sin(theta))
+
+    def rotated_by(self, cos_theta, sin_theta):
+        """Rotate by an angle given as its cosine and sine.
+
+        Saves the trig when rotating lots of vectors by the same angle.
+        """
+        x = self.x
+        y = self.y
+        return self.__class__(x * cos_theta - y * sin_theta, x * sin_theta + y * cos_theta)
 
     def angle(self):
         return atan2(self.y, self.x)
 
+    def reflected(self, normal):
+        """Reflect off a surface with the given unit normal."""
+        nx, ny = normal
+        d = 2 * (self.x * nx + self.y * ny)
+        return self.__class__(self.x - d * nx, self.y - d * ny)
+
 
 class Polar2D:
     __slots__ = 'r', 'theta'
@@ -220,6 +278,188 @@ class Polar2D:
         return bool(self.r)
 
 
+class Vector2DArray:
+    """A batch of Vector2Ds, stored as an (N, 2) float array.
+
+    Speaks the same vocabulary as Vector2D, but every operation works on
+    the whole batch at once.  Scalars in Vector2D become (N,) arrays
+    here: magnitude, angle(), dot() return one value per vector, and
+    scaled() and rotated() accept either a scalar or one value per vector.
+
+    Indexing with an int returns a Vector2D.  Indexing with a slice
+    returns a Vector2DArray that's a view onto the same memory, so
+    writing through it writes through to the original (fancy indexing
+    copies, as it does in NumPy).  The underlying array is .array.
+    """
+    __slots__ = 'array',
+
+    def __init__(self, vectors=()):
+        if isinstance(vectors, Vector2DArray):
+            array = vectors.array
+        elif isinstance(vectors, np.ndarray) and vectors.dtype == np.float64:
+            array = vectors
+        elif isinstance(vectors, (list, tuple)) and vectors and isinstance(vectors[0], (Vector2D, Polar2D)):
+            array = np.array([tuple(Vector2D(v)) for v in vectors], dtype=float)
+        else:
+            array = np.asarray(vectors, dtype=float)
+        if array.ndim != 2 or array.shape[1] != 2:
+            array = array.reshape(-1, 2)
+        self.array = array
+
+    @classmethod
+    def zeros(cls, count):
+        return cls(np.zeros((count, 2)))
+
+    @classmethod
+    def from_polar(cls, r, theta):
+        """Build from radii and angles; either may be a scalar."""
+        r, theta = np.broadcast_arrays(np.asarray(r, dtype=float), np.asarray(theta, dtype=float))
+        return cls(np.column_stack((np.cos(theta) * r, np.sin(theta) * r)))
+
+    def to_polar(self):
+        """Return (r, theta), two (N,) arrays."""
+        return self.magnitude, self.angle()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} of {len(self.array)}>"
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or dtype == self.array.dtype:
+            return self.array
+        return self.array.astype(dtype)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        for x, y in self.array.tolist():
+            yield Vector2D(x, y)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            x, y = self.array[index].tolist()
+            return Vector2D(x, y)
+        return self.__class__(self.array[index])
+
+    def __setitem__(self, index, value):
+        self.array[index] = self._operand(value)
+
+    @property
+    def x(self):
+        return self.array[:, 0]
+
+    @property
+    def y(self):
+        return self.array[:, 1]
+
+    @staticmethod
+    def _operand(other):
+        # A single vector applies to every row.
+        if isinstance(other, Vector2DArray):
+            return other.array
+        if isinstance(other, (Vector2D, Polar2D)):
+            return np.array(tuple(Vector2D(other)))
+        return np.asarray(other, dtype=float)
+
+    def __neg__(self):
+        return self.__class__(-self.array)
+
+    def __add__(self, other):
+        return self.__class__(self.array + self._operand(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.__class__(self.array - self._operand(other))
+
+    def __rsub__(self, other):
+        return self.__class__(self._operand(other) - self.array)
+
+    def __mul__(self, other):
+        return self.__class__(self.array * self._scalars(other))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return self.__class__(self.array / self._scalars(other))
+
+    @staticmethod
+    def _scalars(other):
+        if isinstance(other, (int, float)):
+            return other
+        other = np.asarray(other, dtype=float)
+        if other.ndim == 0:
+            return other
+        if other.ndim != 1:
+            raise ValueError("Vector2DArray can only be multiplied by scalars or one scalar per vector")
+        return other[:, np.newaxis]
+
+    # In-place versions, as on Vector2D.  These write through to
+    # whatever array this is a view of.
+
+    def iadd(self, other):
+        self.array += self._operand(other)
+        return self
+
+    def isub(self, other):
+        self.array -= self._operand(other)
+        return self
+
+    def imul(self, other):
+        self.array *= self._scalars(other)
+        return self
+
+    def dot(self, other):
+        other = self._operand(other)
+        a = self.array
+        return a[:, 0] * other[..., 0] + a[:, 1] * other[..., 1]
+
+    @property
+    def magnitude(self):
+        return np.sqrt(self.magnitude_squared)
+
+    @property
+    def magnitude_squared(self):
+        x = self.array[:, 0]
+        y = self.array[:, 1]
+        return x * x + y * y
+
+    def normalized(self):
+        """Return unit vectors.  Zero vectors stay zero."""
+        return self.scaled(1.0)
+
+    def scaled(self, scale):
+        """Return vectors of length scale.  Zero vectors stay zero."""
+        magnitude = self.magnitude
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = np.where(magnitude > 0, scale / magnitude, 0.0)
+        return self.__class__(self.array * factor[:, np.newaxis])
+
+    def clamped(self, max_magnitude):
+        """Shorten any vector longer than max_magnitude to that length."""
+        magnitude = self.magnitude
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = np.where(magnitude > max_magnitude, max_magnitude / magnitude, 1.0)
+        return self.__class__(self.array * factor[:, np.newaxis])
+
+    def rotated(self, theta):
+        return self.rotated_by(np.cos(theta), np.sin(theta))
+
+    def rotated_by(self, cos_theta, sin_theta):
+        x = self.array[:, 0]
+        y = self.array[:, 1]
+        return self.__class__(np.column_stack((x * cos_theta - y * sin_theta, x * sin_theta + y * cos_theta)))
+
+    def angle(self):
+        return np.arctan2(self.array[:, 1], self.array[:, 0])
+
+    def reflected(self, normals):
+        """Reflect off surfaces with the given unit normals."""
+        normals = self._operand(normals)
+        d = 2 * self.dot(normals)
+        return self.__class__(self.array - d[:, np.newaxis] * normals)
+
+
 if __name__ == "__main__":
     v = Vector2D(1, 2)
     w = Vector2D(3, 4)
@@ -248,4 +488,15 @@ if __name__ == "__main__":
     assert v == another_v
     assert v != w
 
+    vs = Vector2DArray([v, w])
+    print("vs.magnitude", vs.magnitude)
+    print("vs + w", list(vs + w))
+    assert vs[0] == v
+    assert np.allclose(vs.rotated(pi / 2)[1], w.rotated(pi / 2))
+    r, theta = vs.to_polar()
+    assert np.allclose(Vector2DArray.from_polar(r, theta).array, vs.array)
+    view = vs[1:]
+    view.iadd(v)
+    assert vs[1] == v + w
+
 
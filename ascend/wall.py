@@ -1,8 +1,10 @@
-import numpy as np
-from pygame import Rect
+import json
+import math
+import pkgutil
 
 from .vector2d import Vector2D, Polar2D
-from .collision import circle_rect_collision, polygon_collision
+from .collision import circle_rect_collision
+from .triangle_intersect import compile_polygon, compiled_polygon_collision
 from .constants import Layers
 
 def repr_float(f):
@@ -37,12 +39,11 @@ class Wall:
 
         self.level = level
         self.points = points
-        self.upper_left = Vector2D(np.min(self.points, axis=0))
-        self.lower_right = Vector2D(np.max(self.points, axis=0))
-        self.r = Rect(
-            *self.upper_left - Vector2D(50, 50),
-            *self.lower_right - self.upper_left + Vector2D(100, 100)
-        )
+        # wall polygons never change, so work out
+        # their collision geometry up front.
+        self.geometry = compile_polygon(points)
+        self.upper_left = Vector2D(*self.geometry.points.min(axis=0).tolist())
+        self.lower_right = Vector2D(*self.geometry.points.max(axis=0).tolist())
 
         if visible:
             self.layer = level.scene.layers[Layers.ENTITIES]
@@ -68,5 +69,50 @@ class Wall:
         pass
 
     def collide_with_entity(self, entity):
-        return polygon_collision(self.points, entity.pos, entity.radius)
+        return compiled_polygon_collision(self.geometry, entity.pos, entity.radius)
 
+
+
+def level_tiles(left, mid, right):
+    """Return (name, pos, rotation) for the three background tiles of a level."""
+    l = 17
+    t = 34
+    return [
+        (f'bg-end-{left}', (l + 165, 350 + t), 0),
+        (f'bg-mid-{mid}', (l + 165 + 330, 350 + t), 0),
+        (f'bg-end-{right}', (l + 165 + 660, 350 + t), math.pi),
+    ]
+
+
+def load_wall_polygons(fname, pos, rotation):
+    """Load the wall polygons for one background tile placed at pos."""
+    data = pkgutil.get_data(__name__, f'walldata/{fname}-walls.json')
+    pts = json.loads(data.decode('ascii'))
+
+    pos = Vector2D(pos)
+    c = math.cos(rotation)
+    s = math.sin(rotation)
+    return [
+        [pos + Vector2D(x - 165, y - 350).rotated_by(c, s) for x, y in loop]
+        for loop in pts
+        ]
+
+
+def boundary_wall_polygons(width, height):
+    """Invisible walls around the outside of the level."""
+    big_number = 400
+    inset_x = 10
+    inset_y = 30
+    wall_pairs = [
+        ( (-big_number, -big_number), (width + big_number, inset_y) ),
+        ( (width - inset_x, -big_number), (width + big_number, height + big_number) ),
+        ( (-big_number, height - inset_y), (width + big_number, height + big_number) ),
+        ( (-big_number, -big_number), (inset_x, height + big_number) ),
+        ]
+
+    polygons = []
+    for pairs in wall_pairs:
+        ul = Vector2D(pairs[0])
+        lr = Vector2D(pairs[1])
+        polygons.append([(ul.x, ul.y), (lr.x, ul.y), (lr.x, lr.y), (ul.x, lr.y), ])
+    return polygons
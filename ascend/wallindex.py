@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class WallIndex:
+    """A static spatial index of walls.
+
+    Built once per level.  Every wall is entered into each grid cell
+    its exact bounding box touches, and the cell -> wall mapping is
+    packed CSR-style: the walls in cell c are
+    wall_ids[cell_start[c]:cell_start[c + 1]].
+
+    query() then checks each wall's bounding box against the circle's
+    exact bounds.  queries and candidates count calls to query() and
+    the walls they returned; scanned counts the wall ids read out of
+    the cells before the bounding box check.
+    """
+
+    # Picked with benchmarks/wall_index.py.  Smaller cells scan fewer
+    # walls, but a query covers more of them, and visiting cells costs
+    # more than the bounding box checks saved: lookups get quicker all
+    # the way up to 256px, while lookup plus narrowphase is flat from
+    # 48px up.  128px gets most of the lookup gain (about 15% on 64px)
+    # and scans 1.6 walls a query, against 2.3 at 256px.
+    CELL_SIZE = 128
+
+    def __init__(self, walls, cell_size=None):
+        self.walls = list(walls)
+        self.cell_size = cell_size = cell_size or self.CELL_SIZE
+        self.queries = self.candidates = self.scanned = 0
+
+        if not self.walls:
+            self.origin = (0, 0)
+            self.columns = self.rows = 0
+            self.cell_start = np.zeros(1, dtype=np.int32)
+            self.wall_ids = np.zeros(0, dtype=np.int32)
+            self._start = self.cell_start.tolist()
+            self._ids = []
+            self._bounds = []
+            return
+
+        lower = np.array([w.geometry.points.min(axis=0) for w in self.walls])
+        upper = np.array([w.geometry.points.max(axis=0) for w in self.walls])
+        origin = lower.min(axis=0)
+        self.origin = tuple(origin.tolist())
+
+        first = np.floor((lower - origin) / cell_size).astype(int)
+        last = np.floor((upper - origin) / cell_size).astype(int)
+        self.columns, self.rows = (last.max(axis=0) + 1).tolist()
+
+        cells = []
+        ids = []
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(first.tolist(), last.tolist())):
+            for y in range(y0, y1 + 1):
+                for x in range(x0, x1 + 1):
+                    cells.append(y * self.columns + x)
+                    ids.append(i)
+        cells = np.array(cells)
+        ids = np.array(ids)
+        order = np.argsort(cells, kind='stable')
+        counts = np.bincount(cells, minlength=self.columns * self.rows)
+
+        self.cell_start = np.zeros(len(counts) + 1, dtype=np.int32)
+        np.cumsum(counts, out=self.cell_start[1:])
+        self.wall_ids = ids[order].astype(np.int32)
+
+        # query() does a handful of scalar lookups per call,
+        # which is faster on lists than on numpy arrays.
+        self._start = self.cell_start.tolist()
+        self._ids = self.wall_ids.tolist()
+        self._bounds = np.hstack([lower, upper]).tolist()
+
+    def reset_counters(self):
+        self.queries = self.candidates = self.scanned = 0
+
+    def query(self, pos, radius):
+        """Return the walls whose bounding boxes might touch a circle."""
+        self.queries += 1
+        s = self.cell_size
+        ox, oy = self.origin
+        x, y = pos[0] - ox, pos[1] - oy
+        x0 = max(int((x - radius) // s), 0)
+        x1 = min(int((x + radius) // s), self.columns - 1)
+        y0 = max(int((y - radius) // s), 0)
+        y1 = min(int((y + radius) // s), self.rows - 1)
+        if x0 > x1 or y0 > y1:
+            return []
+
+        start = self._start
+        ids = self._ids
+        columns = self.columns
+        if x0 == x1 and y0 == y1:
+            c = y0 * columns + x0
+            found = ids[start[c]:start[c + 1]]
+        else:
+            found = set()
+            for cy in range(y0, y1 + 1):
+                row = cy * columns
+                for c in range(row + x0, row + x1 + 1):
+                    found.update(ids[start[c]:start[c + 1]])
+        self.scanned += len(found)
+        walls = self.walls
+        bounds = self._bounds
+        left = pos[0] - radius
+        right = pos[0] + radius
+        top = pos[1] - radius
+        bottom = pos[1] + radius
+        result = []
+        for i in found:
+            l, t, r, b = bounds[i]
+            if l <= right and r >= left and t <= bottom and b >= top:
+                result.append(walls[i])
+        self.candidates += len(result)
+        return result
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Play Endless levels with a bot, on every core, to check the difficulty curve.
+
+Each run builds one Endless level headless (see ascend/headless.py)
+from its own random seed and lets a Bot play it with one life, until
+the knight dies, the level is cleared, or --seconds of game time have
+gone by.  Runs are shared out across a ProcessPoolExecutor, one worker
+per core unless --workers says otherwise.
+
+For each level number, the report gives how many runs there were, the
+share the bot cleared and died in, how long it survived (mean and
+median, in game seconds), how many enemies it killed, ms/frame (mean
+over the runs, and the worst run's p95), and the peak number of
+enemies at once (mean and worst).
+
+The bot isn't a good player.  It isn't meant to be: what matters is
+that it plays the same way at every level, so if the numbers fall off
+a cliff between two levels, the formula in Level.populate is to blame.
+
+--save FILE writes every run, and the report, as JSON.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.balance [--levels 1-20] [--seeds N] [--seconds S]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+
+os.environ['ASCEND_HEADLESS'] = '1'
+
+import numpy as np
+
+from ascend import control
+from ascend.engine import clock, keys
+from ascend.game import Game
+from ascend.knight import Bomb
+from ascend.mobs import Shot
+from ascend.settings import load_settings
+
+from .scenarios import git_revision, new_game
+
+
+LEVELS = range(1, 21)
+SEEDS = 50
+SECONDS = 60
+
+
+class Bot:
+    """Scripted play: kite until fast, then charge; bomb crowds.
+
+    The knight's zone of destruction only comes out above
+    Player.zone_activation_speed, and points the way he's
+    accelerating.  Below that speed, touching anything is death.  So
+    the bot runs from the enemies around it--the nearest counting the
+    most, with a pull towards the middle so it isn't cornered--until
+    it's going fast enough, and only then charges the nearest enemy
+    roughly ahead of it.  Turning hard bleeds speed, so enemies behind
+    it are left for later.
+    """
+
+    # enemies within DANGER are run from
+    DANGER = 250
+    # how hard the middle of the arena pulls, at the edge
+    CENTER_PULL = 0.2
+    # charge enemies within this angle of the way we're going
+    AHEAD = math.radians(60)
+    # bomb when this many enemies are within Bomb.KILL_RADIUS
+    CROWD = 6
+
+    BOMB = control.KEY_BITS[keys.SPACE]
+
+    def inputs(self, level):
+        player = level.player
+        store = level.enemy_store
+        if not player or player.dead or not store.count:
+            return control.Inputs()
+
+        rows = store.rows
+        here = np.array((player.pos.x, player.pos.y))
+        offset = store.pos[rows] - here
+        distance = np.maximum(np.hypot(offset[:, 0], offset[:, 1]), 1.0)
+        direction = offset / distance[:, np.newaxis]
+
+        pressed = 0
+        if player.bombs and np.count_nonzero(distance < Bomb.KILL_RADIUS) >= self.CROWD:
+            pressed = self.BOMB
+
+        momentum = np.array((player.momentum.x, player.momentum.y))
+        speed = np.hypot(*momentum)
+        if speed >= player.zone_activation_speed:
+            ahead = direction @ (momentum / speed) > math.cos(self.AHEAD)
+            if ahead.any():
+                target = np.flatnonzero(ahead)[np.argmin(distance[ahead])]
+                dx, dy = direction[target].tolist()
+                return control.Inputs(pressed, axes=(dx, dy))
+
+        near = distance < self.DANGER
+        away = -(direction[near] / distance[near, np.newaxis]).sum(axis=0)
+        middle = np.array((level.scene.width, level.scene.height)) / 2
+        away += (middle - here) / middle * self.CENTER_PULL
+        length = np.hypot(*away)
+        if length:
+            away /= length
+        dx, dy = away.tolist()
+        return control.Inputs(pressed, axes=(dx, dy))
+
+
+def play(job):
+    """Play Endless level_number from seed.  Returns the run's numbers."""
+    level_number, seed, seconds = job
+    game = new_game(f"Endless {level_number}", seed)
+    bot = Bot()
+    frames = round(seconds / Game.SIM_DT)
+    perf_counter = time.perf_counter
+    times = []
+    seen = set()
+    peak = 0
+    outcome = 'timeout'
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in range(frames):
+            level = game.level
+            t = perf_counter()
+            clock.tick(Game.SIM_DT)
+            game.advance(Game.SIM_DT, bot.inputs(level))
+            times.append(perf_counter() - t)
+
+            enemies = level.enemies
+            peak = max(peak, len(enemies))
+            seen.update(e.id for e in enemies if not isinstance(e, Shot))
+            if game.paused:
+                outcome = 'died' if level.player.dead else 'cleared'
+                break
+        left = sum(1 for e in game.level.enemies if not isinstance(e, Shot))
+        game.delete()
+
+    ms = np.array(times) * 1000
+    return {
+        'level': level_number,
+        'seed': seed,
+        'outcome': outcome,
+        'survived': round(len(times) * Game.SIM_DT, 3),
+        'kills': len(seen) - left,
+        'ms_mean': round(float(ms.mean()), 4),
+        'ms_p95': round(float(np.percentile(ms, 95)), 4),
+        'peak_enemies': peak,
+    }
+
+
+def init_worker():
+    with contextlib.redirect_stdout(io.StringIO()):
+        control.init_controls(load_settings())
+
+
+def summarize(runs):
+    """Merge runs into {level number: summary}."""
+    by_level = {}
+    for run in runs:
+        by_level.setdefault(run['level'], []).append(run)
+
+    report = {}
+    for level_number, level_runs in sorted(by_level.items()):
+        n = len(level_runs)
+        survived = np.array([r['survived'] for r in level_runs])
+        peaks = [r['peak_enemies'] for r in level_runs]
+        report[level_number] = {
+            'runs': n,
+            'cleared': round(sum(r['outcome'] == 'cleared' for r in level_runs) / n, 3),
+            'died': round(sum(r['outcome'] == 'died' for r in level_runs) / n, 3),
+            'survived_mean': round(float(survived.mean()), 2),
+            'survived_p50': round(float(np.median(survived)), 2),
+            'kills_mean': round(sum(r['kills'] for r in level_runs) / n, 2),
+            'ms_mean': round(sum(r['ms_mean'] for r in level_runs) / n, 4),
+            'ms_p95_worst': max(r['ms_p95'] for r in level_runs),
+            'peak_mean': round(sum(peaks) / n, 1),
+            'peak_max': max(peaks),
+        }
+    return report
+
+
+COLUMNS = [
+    # key, heading, width, format
+    ('runs', 'runs', 6, 'd'),
+    ('cleared', 'cleared', 8, '.0%'),
+    ('died', 'died', 6, '.0%'),
+    ('survived_mean', 'alive s', 8, '.1f'),
+    ('survived_p50', 'p50', 6, '.1f'),
+    ('kills_mean', 'kills', 7, '.1f'),
+    ('ms_mean', 'ms mean', 8, '.3f'),
+    ('ms_p95_worst', 'p95 max', 8, '.3f'),
+    ('peak_mean', 'peak', 6, '.0f'),
+    ('peak_max', 'max', 5, 'd'),
+]
+
+
+def print_report(report):
+    line = f"{'level':>6}"
+    for key, heading, width, fmt in COLUMNS:
+        line += f" {heading:>{width}}"
+    print(line)
+    for level_number, summary in report.items():
+        line = f"{level_number:>6}"
+        for key, heading, width, fmt in COLUMNS:
+            line += f" {summary[key]:>{width}{fmt}}"
+        print(line)
+
+
+def level_range(s):
+    """'5' or '1-20', as a list of level numbers."""
+    start, dash, end = s.partition('-')
+    try:
+        if not dash:
+            return [int(s)]
+        return list(range(int(start), int(end) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected N or FIRST-LAST") from None
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks.balance', description=__doc__.split('\n')[0])
+    parser.add_argument('--levels', type=level_range, nargs='+', metavar='N', help="level numbers, e.g. 1-20 or 5 10 50")
+    parser.add_argument('--seeds', type=int, default=SEEDS, help="runs per level, each from its own seed")
+    parser.add_argument('--first-seed', type=int, default=0, help="seed of the first run")
+    parser.add_argument('--seconds', type=float, default=SECONDS, help="game time a run may last")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes to run at once")
+    parser.add_argument('--save', metavar='FILE', help="save the runs and the report as JSON")
+    args = parser.parse_args()
+
+    levels = sorted({n for ns in args.levels for n in ns}) if args.levels else list(LEVELS)
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    jobs = [(level_number, seed, args.seconds) for level_number in levels for seed in seeds]
+
+    print(f"{len(jobs)} runs: {len(seeds)} seeds of levels {levels[0]} to {levels[-1]}, "
+          f"at most {args.seconds:g}s each, on {args.workers} workers")
+    start = time.perf_counter()
+    runs = []
+    chunksize = max(1, len(jobs) // (args.workers * 8))
+    with concurrent.futures.ProcessPoolExecutor(args.workers, initializer=init_worker) as executor:
+        for run in executor.map(play, jobs, chunksize=chunksize):
+            runs.append(run)
+            if len(runs) % max(1, len(jobs) // 20) == 0:
+                print(f"  {len(runs)}/{len(jobs)}", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"took {elapsed:.1f}s ({elapsed / len(jobs) * args.workers:.2f}s per run per worker)")
+
+    report = summarize(runs)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'revision': git_revision(),
+                'python': sys.version.split()[0],
+                'seconds': args.seconds,
+                'report': report,
+                'runs': runs,
+            }, f, indent=1, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""Count the vector conversions made by per-frame hot paths.
+
+Runs the old and new versions of each hot path against stand-in
+sprites and counts the vector objects each call allocates: Vector2D,
+wasabi2d Vector2, and NumPy arrays derived from sprite or enemy-store
+positions.  The old versions are copied here from before Vector2D
+learned the array protocol.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.conversions
+"""
+import math
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+
+from ascend import knight, mobs
+from ascend.engine import Vector2
+from ascend.enemystore import EnemyStore, stored_vector
+from ascend.particles import NullParticleGroup
+from ascend.vector2d import Vector2D, angle_diff
+
+
+counts = {'Vector2D': 0, 'Vector2': 0, 'ndarray': 0}
+
+
+class CountingArray(np.ndarray):
+    def __array_finalize__(self, obj):
+        counts['ndarray'] += 1
+
+
+class CountingVector2(Vector2):
+    def __init__(self, *args):
+        counts['Vector2'] += 1
+        super().__init__(*args)
+
+
+def counting_init(init):
+    def __init__(self, *args):
+        counts['Vector2D'] += 1
+        init(self, *args)
+    return __init__
+
+
+class Sprite:
+    """Stands in for a wasabi2d sprite, which keeps pos in an array."""
+
+    def __init__(self, pos, **kwargs):
+        self._pos = np.array(pos, dtype=float).view(CountingArray)
+        self.__dict__.update(kwargs)
+
+    @property
+    def pos(self):
+        return self._pos
+
+    @pos.setter
+    def pos(self, v):
+        self._pos[:] = v
+
+
+class Mob:
+    pos = stored_vector('pos')
+
+    @property
+    def row(self):
+        return self._row
+
+
+# ---- the old hot paths ----
+
+def old_skeleton_update(self, dt):
+    target = self.level.player
+    if target:
+        to_target = Vector2(*target.pos - self.head.pos)
+        dist, angle_deg = to_target.as_polar()
+        angle_to_target = math.radians(angle_deg)
+        self.head.angle = angle_to_target
+
+    cur_pos = Vector2D(self.head.pos)
+    dist = (cur_pos - self.last_pos).magnitude
+    self.last_pos = cur_pos
+
+    self.t += dist * self.gait_speed
+
+    self.bob += self.gait_speed * dist
+    if self.bob > self.gait_step:
+        self.bob = 1.0
+    self.head.scale = self.body.scale = self.bob
+    self.body.angle = angle_to_target + 0.1 * np.sin(self.t * 50)
+
+
+def old_controller_update(self, dt):
+    self.v *= self.DRAG ** dt   # drag
+
+    if self.accel:
+        # New acceleration this frame
+        self.v += self.ACCELERATION * self.accel * dt
+
+    da, accel_angle = self.accel.as_polar()
+    accel_angle = math.radians(accel_angle)
+
+    delta = angle_diff(accel_angle, self.knight.angle)
+    if delta < 0:
+        self.knight.angle += max(dt * da * -self.TURN, delta)
+    else:
+        self.knight.angle += min(dt * da * self.TURN, delta)
+
+    # Keep within the play area
+    sz = Vector2(self.knight.radius, self.knight.radius)
+    scene = self.knight.scene
+    self.knight.pos = np.clip(
+        self.knight.pos + self.v * dt,
+        sz,
+        Vector2(scene.width, scene.height) - sz
+    )
+    self.knight.v = self.v
+
+    self.accel *= 0.0
+
+
+def old_knight_update(self, dt):
+    if self.last_pos:
+        displacement = Vector2(*self.pos - self.last_pos)
+        distance = displacement.length()
+        num = np.random.poisson(distance * self.SMOKE_RATE)
+        if num:
+            stern = self.pos - displacement.normalize() * 10
+            if self.scene.smoke:
+                self.scene.smoke.emit(
+                    num=num,
+                    pos=stern,
+                    pos_spread=2,
+                    vel=displacement * 0.3,
+                    spin_spread=1,
+                    size=7,
+                    angle=self.knight.angle,
+                    angle_spread=3,
+                )
+
+        self.step += distance
+
+        # Scale the knight to simulate gait
+        bob = 1.1 + 0.1 * np.sin(self.step / 500)
+        self.knight.scale = bob
+    self.last_pos = Vector2(*self.pos)
+
+
+def old_wall_push(store, mob, penetration):
+    mob.pos -= Vector2D(*penetration.tolist())
+    mob.shape.pos = mob.pos
+
+
+def new_wall_push(store, mob, penetration):
+    row = mob.row
+    store.pos[row] -= penetration
+    mob.shape.pos = store.pos[row].tolist()
+
+
+# ---- stand-ins ----
+
+def make_skeleton():
+    skeleton = object.__new__(mobs.Skeleton)
+    skeleton.level = SimpleNamespace(player=SimpleNamespace(pos=Vector2D(500, 400)))
+    skeleton.head = Sprite((100, 100), angle=0, scale=1)
+    skeleton.body = Sprite((100, 100), angle=0, scale=1)
+    skeleton.last_pos = Vector2D(99, 99)
+    skeleton.t = 0
+    skeleton.bob = 1.0
+    skeleton.gait_speed = 0.008
+    skeleton.gait_step = 1.1
+    return skeleton
+
+
+class StandInKnight:
+    radius = 12
+
+    @property
+    def pos(self):
+        return self.knight.pos
+
+    @pos.setter
+    def pos(self, v):
+        self.knight.pos = v
+
+    def __init__(self):
+        self.knight = Sprite((300, 300), scale=1)
+        self.scene = SimpleNamespace(width=1024, height=768)
+        self.angle = 0
+        self.v = None
+
+
+def make_controller():
+    controller = object.__new__(knight.KnightController)
+    controller.knight = StandInKnight()
+    controller.v = Vector2(40, 30)
+    controller.accel = Vector2(0, 0)
+    return controller
+
+
+def make_knight():
+    k = object.__new__(knight.Knight)
+    k.knight = Sprite((300, 300), scale=1)
+    k.shield = SimpleNamespace(update=lambda: None)
+    k.scene = SimpleNamespace(smoke=NullParticleGroup())
+    k.last_pos = Vector2(299, 299)
+    k.step = 0
+    return k
+
+
+def make_mob():
+    store = EnemyStore()
+    store.pos = store.pos.view(CountingArray)
+    mob = Mob()
+    store.add(mob, radius=10)
+    mob.pos = Vector2D(100, 100)
+    mob.shape = Sprite((100, 100))
+    return store, mob
+
+
+def skeleton_case(update):
+    skeleton = make_skeleton()
+    return lambda: update(skeleton, 1 / 60)
+
+
+def controller_case(update):
+    controller = make_controller()
+    return lambda: update(controller, 1 / 60)
+
+
+def knight_case(update):
+    k = make_knight()
+
+    def run():
+        k.last_pos = Vector2(299, 299)
+        update(k, 1 / 60)
+    return run
+
+
+def wall_case(push):
+    store, mob = make_mob()
+    penetration = np.array([0.0, 0.0])
+    return lambda: push(store, mob, penetration)
+
+
+def wall_bounds_old(points=np.random.uniform(0, 500, (6, 2))):
+    return Vector2D(np.min(points, axis=0)), Vector2D(np.max(points, axis=0))
+
+
+def wall_bounds_new(points=np.random.uniform(0, 500, (6, 2))):
+    return Vector2D(*points.min(axis=0).tolist()), Vector2D(*points.max(axis=0).tolist())
+
+
+CASES = [
+    # name, calls per frame (20 skeleton-shaped enemies, one knight), old, new
+    ("Skeleton.update", 20, skeleton_case(old_skeleton_update), skeleton_case(mobs.Skeleton.update)),
+    ("KnightController.update", 1, controller_case(old_controller_update), controller_case(knight.KnightController.update)),
+    ("Knight.update", 1, knight_case(old_knight_update), knight_case(knight.Knight.update)),
+    ("wall push", 5, wall_case(old_wall_push), wall_case(new_wall_push)),
+    ("Wall bounds", 0, wall_bounds_old, wall_bounds_new),
+]
+
+
+def count(fn, number=100):
+    for name in counts:
+        counts[name] = 0
+    for _ in range(number):
+        fn()
+    return {name: n / number for name, n in counts.items()}
+
+
+def main():
+    global Vector2
+    plain_init = Vector2D.__init__
+    Vector2D.__init__ = counting_init(plain_init)
+    knight.Vector2 = mobs.Vector2 = Vector2 = CountingVector2
+    try:
+        header = f"{'hot path':>24} {'old allocs':>10} {'new allocs':>10} {'old us':>8} {'new us':>8}"
+        print(header)
+        saved = 0
+        for name, per_frame, old, new in CASES:
+            old_counts = count(old)
+            new_counts = count(new)
+            old_total = sum(old_counts.values())
+            new_total = sum(new_counts.values())
+            saved += per_frame * (old_total - new_total)
+            old_time = min(timeit.repeat(old, number=2000, repeat=3)) / 2000
+            new_time = min(timeit.repeat(new, number=2000, repeat=3)) / 2000
+            print(f"{name:>24} {old_total:>10.1f} {new_total:>10.1f} {old_time * 1e6:>8.2f} {new_time * 1e6:>8.2f}")
+        print()
+        print(f"allocations saved per frame (20 skeletons, 5 wall pushes): {saved:.0f}")
+    finally:
+        Vector2D.__init__ = plain_init
+        knight.Vector2 = mobs.Vector2 = Vector2 = CountingVector2.__base__
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Benchmark whole levels: every LevelSpawner level, and an Endless sweep.
+
+Each scenario builds a level headless (see ascend/headless.py) from a
+fixed random seed, makes the player invulnerable, and steps it with
+scripted input--the player skates round in a fixed pattern--for a
+fixed number of frames.  For each scenario it reports ms/frame (mean,
+p50, p95 and worst), how many enemies there were at the start and end,
+the mean number of objects, per-frame ticks and live particles, and
+how often the level's object pools had something free to reuse.
+
+With --allocations, each scenario is run again under tracemalloc, for
+the bytes allocated in a frame (the peak above where the frame
+started) and how much memory the run kept hold of.  That run is much
+slower, so it's separate from the timings.
+
+The Endless sweep ends with a chart of ms/frame against level number.
+
+--save FILE writes the results as JSON, and --compare FILE prints the
+change in ms/frame against results saved earlier--say, on another
+commit:
+
+    git checkout main && python3 -m benchmarks.scenarios --save main.json
+    git checkout - && python3 -m benchmarks.scenarios --compare main.json
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.scenarios [--frames N] [--only NAME ...]
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ['ASCEND_HEADLESS'] = '1'
+
+import numpy as np
+
+from ascend import control, headless
+from ascend.engine import clock, keys
+from ascend.game import Game
+from ascend.settings import load_settings
+
+
+LEVELS = ["1", "2", "3", "4", "5", "6", "7", "1each", "prince"]
+ENDLESS = [1, 5, 10, 20, 50]
+
+SEED = 0
+WARMUP = 60
+FRAMES = 600
+ALLOCATION_FRAMES = 120
+
+# the scripted input: hold each of these for STRIDE frames, round and round
+PATTERN = [
+    (keys.D,), (keys.D, keys.S), (keys.S,), (keys.S, keys.A),
+    (keys.A,), (keys.A, keys.W), (keys.W,), (keys.W, keys.D),
+]
+STRIDE = 40
+
+
+def scripted_inputs(frame):
+    pressed = 0
+    for key in PATTERN[frame // STRIDE % len(PATTERN)]:
+        pressed |= control.KEY_BITS[key]
+    return control.Inputs(pressed)
+
+
+def new_game(level, seed=SEED):
+    # nothing left over from the last scenario
+    headless.reset()
+    random.seed(seed)
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game({}, 'larry', argv=['bench', level])
+        game.new()
+    return game
+
+
+def step(game, frame):
+    if game.level.player:
+        game.level.player.invulnerable = math.inf
+    clock.tick(Game.SIM_DT)
+    game.advance(Game.SIM_DT, scripted_inputs(frame))
+
+
+def run_scenario(level, frames):
+    game = new_game(level)
+    start_enemies = len(game.level.enemies)
+    perf_counter = time.perf_counter
+    times = []
+    objects = ticks = particles = 0
+    completed = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in range(WARMUP):
+            step(game, frame)
+        for frame in range(WARMUP, WARMUP + frames):
+            t = perf_counter()
+            step(game, frame)
+            times.append(perf_counter() - t)
+
+            current = game.level
+            objects += len(current.objects)
+            ticks += len(current.ticks)
+            particles += game.scene.particle_count()
+            if game.paused and completed is None:
+                completed = frame
+        end_enemies = len(game.level.enemies)
+        pools = game.level.pools.values()
+        hits = sum(pool.hits for pool in pools)
+        acquired = hits + sum(pool.misses for pool in pools)
+        game.delete()
+
+    ms = np.array(times) * 1000
+    return {
+        'ms_mean': round(float(ms.mean()), 4),
+        'ms_p50': round(float(np.percentile(ms, 50)), 4),
+        'ms_p95': round(float(np.percentile(ms, 95)), 4),
+        'ms_max': round(float(ms.max()), 4),
+        'enemies_start': start_enemies,
+        'enemies_end': end_enemies,
+        'objects_mean': round(objects / frames, 2),
+        'ticks_mean': round(ticks / frames, 2),
+        'particles_mean': round(particles / frames, 2),
+        'pool_hit_rate': round(hits / acquired, 3) if acquired else None,
+        'completed_at': completed,
+    }
+
+
+def measure_allocations(level, frames):
+    game = new_game(level)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in range(WARMUP):
+            step(game, frame)
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        peaks = []
+        for frame in range(WARMUP, WARMUP + frames):
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            step(game, frame)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - start)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        game.delete()
+    return {
+        'alloc_kb_per_frame': round(sum(peaks) / frames / 1024, 2),
+        'retained_kb': round((after - before) / 1024, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+COLUMNS = [
+    # key, heading, width, format
+    ('ms_mean', 'ms mean', 8, '.3f'),
+    ('ms_p50', 'p50', 8, '.3f'),
+    ('ms_p95', 'p95', 8, '.3f'),
+    ('ms_max', 'max', 8, '.3f'),
+    ('enemies_start', 'enemies', 8, 'd'),
+    ('enemies_end', 'at end', 7, 'd'),
+    ('objects_mean', 'objects', 8, '.1f'),
+    ('ticks_mean', 'ticks', 7, '.1f'),
+    ('particles_mean', 'particles', 10, '.0f'),
+    ('pool_hit_rate', 'pool hits', 10, '.0%'),
+    ('alloc_kb_per_frame', 'KB/frame', 9, '.1f'),
+    ('retained_kb', 'KB kept', 8, '.1f'),
+]
+
+
+ALLOCATION_KEYS = ('alloc_kb_per_frame', 'retained_kb')
+
+
+def print_header(allocations):
+    line = f"{'scenario':>12}"
+    for key, heading, width, fmt in COLUMNS:
+        if allocations or key not in ALLOCATION_KEYS:
+            line += f" {heading:>{width}}"
+    print(line)
+
+
+def print_row(name, result):
+    line = f"{name:>12}"
+    for key, heading, width, fmt in COLUMNS:
+        if key not in result:
+            continue
+        if result[key] is None:
+            line += f" {'-':>{width}}"
+            continue
+        line += f" {result[key]:>{width}{fmt}}"
+    print(line, flush=True)
+
+
+def chart(results, width=50):
+    """Plot ms/frame for the Endless sweep."""
+    sweep = [(name, r['ms_mean']) for name, r in results.items() if name.startswith("Endless ")]
+    if not sweep:
+        return
+    print()
+    print("ms/frame by Endless level:")
+    most = max(ms for _, ms in sweep)
+    for name, ms in sweep:
+        bar = '#' * max(1, round(ms / most * width))
+        print(f"{name[8:]:>4} {bar} {ms:.3f}")
+
+
+def compare(results, path):
+    with open(path) as f:
+        old = json.load(f)
+    print()
+    print(f"ms/frame against {path} ({old.get('revision') or 'unknown revision'}):")
+    print(f"{'scenario':>12} {'old':>8} {'new':>8} {'change':>8}")
+    for name, result in results.items():
+        before = old['scenarios'].get(name)
+        if not before:
+            continue
+        change = (result['ms_mean'] / before['ms_mean'] - 1) * 100
+        print(f"{name:>12} {before['ms_mean']:>8.3f} {result['ms_mean']:>8.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks.scenarios', description=__doc__.split('\n')[0])
+    parser.add_argument('--frames', type=int, default=FRAMES, help="frames to time in each scenario")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="just these scenarios, e.g. 6 'Endless 10'")
+    parser.add_argument('--allocations', action='store_true', help="also measure allocations (slow)")
+    parser.add_argument('--save', metavar='FILE', help="save the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="compare with results saved earlier")
+    args = parser.parse_args()
+
+    scenarios = LEVELS + [f"Endless {n}" for n in ENDLESS]
+    if args.only:
+        scenarios = [name for name in scenarios if name in args.only]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        control.init_controls(load_settings())
+
+    print(f"{args.frames} frames per scenario, after {WARMUP} to warm up")
+    print_header(args.allocations)
+    results = {}
+    for name in scenarios:
+        result = results[name] = run_scenario(name, args.frames)
+        if args.allocations:
+            result.update(measure_allocations(name, min(args.frames, ALLOCATION_FRAMES)))
+        print_row(name, result)
+
+    chart(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'revision': git_revision(),
+                'python': sys.version.split()[0],
+                'frames': args.frames,
+                'scenarios': results,
+            }, f, indent=1, sort_keys=True)
+            f.write('\n')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark enemy-vs-enemy separation.
+
+Compares the old all-pairs loop from Level.resolve_collisions with the
+grid broadphase in ascend.collision.separate_entities, and checks that
+both push everything to the same place.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.separation
+"""
+import random
+import time
+
+from ascend.collision import separate_entities
+from ascend.vector2d import Vector2D
+
+from pygame.math import Vector2
+
+
+WIDTH = 1024
+HEIGHT = 768
+
+
+class Mob:
+    def __init__(self, pos, radius):
+        self.pos = pos
+        self.radius = radius
+
+
+def make_mobs(count, seed):
+    rng = random.Random(seed)
+    return [
+        Mob(
+            Vector2D(rng.uniform(30, WIDTH - 30), rng.uniform(30, HEIGHT - 30)),
+            rng.choice((8, 10, 10, 10, 15, 20)),
+            )
+        for _ in range(count)
+        ]
+
+
+def all_pairs(enemies):
+    # the loop Level.resolve_collisions used to run
+    for i, mob1 in enumerate(enemies):
+        p1 = mob1.pos
+        r1 = mob1.radius
+        for mob2 in enemies[i + 1:]:
+            r2 = mob2.radius
+            r = r1 + r2
+            p2 = mob2.pos
+            sep = Vector2(*p2 - p1)
+            if sep.magnitude_squared() < r * r:
+                mag = sep.magnitude()
+                overlap = r - mag
+                if mag:
+                    sep.normalize_ip()
+                else:
+                    sep = Vector2(0, 1)
+                frac = (r1 * r1) / (r1 * r1 + r2 * r2)
+                mob1.pos = p1 - sep * overlap * (1.0 - frac)
+                mob2.pos = p2 + sep * overlap * frac
+
+
+def run(fn, count, frames, seed):
+    mobs = make_mobs(count, seed)
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn(mobs)
+    elapsed = time.perf_counter() - start
+    return mobs, elapsed / frames
+
+
+def main():
+    frames = 20
+    print(f"{'enemies':>8} {'all pairs':>12} {'grid':>12} {'speedup':>8}  match")
+    for count in (50, 200, 1000):
+        old, old_time = run(all_pairs, count, frames, seed=count)
+        new, new_time = run(separate_entities, count, frames, seed=count)
+        match = all(
+            (a.pos[0], a.pos[1]) == (b.pos[0], b.pos[1])
+            for a, b in zip(old, new)
+            )
+        print(
+            f"{count:>8} "
+            f"{old_time * 1000:>9.3f} ms "
+            f"{new_time * 1000:>9.3f} ms "
+            f"{old_time / new_time:>7.1f}x  "
+            f"{'yes' if match else 'NO'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
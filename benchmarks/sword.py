@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Benchmark sword attacks, end to end through Level.test_attacks.
+
+A knight stands in the middle of a ring of mobs, all within reach,
+and swings his sword once round, a fixed angle per frame.  The old test_attacks checked the sword
+against each mob in turn with line_segment_intersects_circle(), which
+only sees where the sword is this frame; the new one tests all the mobs
+at once with segment_circles_collision(), and also against the area
+the sword swept since last frame.
+
+For each swing speed, this reports the time per frame of each and how
+many mobs each killed, and checks that the new one kills everything
+the old one did.  The faster the swing, the more mobs the old one
+misses, as the sword passes straight over them between frames.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.sword
+"""
+import math
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ['ASCEND_HEADLESS'] = '1'
+
+import numpy as np
+
+from ascend.engine import Vector2
+from ascend.level import Level
+from ascend.vector2d import Vector2D
+
+
+CENTER = (512, 384)
+MOBS = 200
+# mob radius, as Level.test_attacks has it
+RADIUS = 20
+
+
+class Mob:
+    def __init__(self, pos):
+        self.pos = pos
+        self.killed = False
+
+    def die(self, v):
+        self.killed = True
+
+
+def make_mobs(seed):
+    rng = random.Random(seed)
+    mobs = []
+    for _ in range(MOBS):
+        distance = rng.uniform(20, 60)
+        angle = rng.uniform(-math.pi, math.pi)
+        mobs.append(Mob(Vector2D(
+            CENTER[0] + distance * math.cos(angle),
+            CENTER[1] + distance * math.sin(angle),
+        )))
+    return mobs
+
+
+def make_level(mobs):
+    pc = SimpleNamespace(
+        pos=Vector2(*CENTER),
+        v=Vector2(0, 0),
+        sword=SimpleNamespace(attack=True, angle=0.0, last_swing=None),
+    )
+    level = object.__new__(Level)
+    level.pcs = [pc]
+    level.mobs = list(mobs)
+    return level
+
+
+def line_segment_intersects_circle(start, along, center, radius):
+    # the per-mob test Level.test_attacks used to run
+    Q = center
+    r = radius
+    P1 = start
+    V = along
+    a = np.dot(V, V)
+    b = 2 * np.dot(V, P1 - Q)
+    c = np.dot(P1, P1) + np.dot(Q, Q) - 2 * np.dot(P1, Q) - r * r
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    sqrt_disc = math.sqrt(disc)
+    t1 = (-b + sqrt_disc) / (2 * a)
+    t2 = (-b - sqrt_disc) / (2 * a)
+    if not (0 <= t1 <= 1 or 0 <= t2 <= 1):
+        return None
+    t = max(0, min(1, - b / (2 * a)))
+    return P1 + t * V
+
+
+def old_test_attacks(level):
+    # the loop Level.test_attacks used to run
+    for pc in level.pcs:
+        sword = pc.sword
+        if not sword.attack:
+            continue
+        pos = pc.pos
+        angle = sword.angle
+        dir = Vector2(np.cos(angle), np.sin(angle))
+        start = pos + dir * 12
+        along = dir * 40
+        for mob in level.mobs[:]:
+            if line_segment_intersects_circle(start, along, Vector2(*mob.pos), RADIUS) is not None:
+                sep = mob.pos - pc.pos
+                mob.die(pc.v + sep.scaled(30))
+                level.mobs.remove(mob)
+
+
+def run(test_attacks, step, seed):
+    mobs = make_mobs(seed)
+    level = make_level(mobs)
+    sword = level.pcs[0].sword
+    frames = math.ceil(2 * math.pi / step)
+    elapsed = 0.0
+    for frame in range(frames):
+        sword.angle = frame * step
+        start = time.perf_counter()
+        test_attacks(level)
+        elapsed += time.perf_counter() - start
+    return [mob.killed for mob in mobs], elapsed / frames
+
+
+def main():
+    print(f"{MOBS} mobs, one swing round")
+    print(f"{'rad/frame':>10} {'old':>12} {'new':>12} {'old kills':>10} {'new kills':>10}  new has all old")
+    for step in (0.1, 0.3, 0.6, 1.0, 1.5):
+        old, old_time = run(old_test_attacks, step, seed=0)
+        new, new_time = run(Level.test_attacks, step, seed=0)
+        covered = all(n for o, n in zip(old, new) if o)
+        print(
+            f"{step:>10.1f} "
+            f"{old_time * 1000:>9.3f} ms "
+            f"{new_time * 1000:>9.3f} ms "
+            f"{sum(old):>10} {sum(new):>10}  "
+            f"{'yes' if covered else 'NO'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark the Vector2D operations that show up in hot loops.
+
+OldVector2D below carries the methods as they were before the fast
+paths went in, so both run side by side against the same inputs.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.vector2d
+"""
+import timeit
+from math import sin, cos, sqrt
+
+from ascend.vector2d import Vector2D, Polar2D
+
+
+class OldVector2D(Vector2D):
+    __slots__ = ()
+
+    def __init__(self, x=None, y=None):
+        if y is None:
+            if isinstance(x, Polar2D):
+                r = x.r
+                theta = x.theta
+                x = cos(theta) * r
+                y = sin(theta) * r
+            elif x is None:
+                x = y = 0
+            else:
+                x, y = x
+        object.__setattr__(self, 'x', x)
+        object.__setattr__(self, 'y', y)
+        object.__setattr__(self, '_Vector2D__magnitude', None)
+        object.__setattr__(self, '_Vector2D__magnitude_squared', None)
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+
+    def __add__(self, other):
+        if isinstance(other, Polar2D):
+            other = self.__class__(other)
+            x = other.x
+            y = other.y
+        elif hasattr(other, '__getitem__'):
+            x, y = other
+        else:
+            x = y = other
+        return self.__class__(self.x + x, self.y + y)
+
+    def __sub__(self, other):
+        if isinstance(other, Polar2D):
+            other = self.__class__(other)
+            x = other.x
+            y = other.y
+        elif hasattr(other, '__getitem__'):
+            x, y = other
+        else:
+            x = y = other
+        return self.__class__(self.x - x, self.y - y)
+
+    def dot(self, other):
+        if not isinstance(other, Vector2D):
+            other = self.__class__(other)
+        return sqrt(self.magnitude_squared + other.magnitude_squared) * cos(Polar2D(self).theta - Polar2D(other).theta)
+
+    def rotated(self, theta):
+        polar = Polar2D(self)
+        polar2 = Polar2D(polar.r, polar.theta + theta)
+        return self.__class__(polar2)
+
+
+CASES = [
+    ("construct", "V(3.0, 4.0)"),
+    ("copy", "V(a)"),
+    ("a + b", "a + b"),
+    ("a - b", "a - b"),
+    ("a + tuple", "a + t"),
+    ("a * 2.5", "a * 2.5"),
+    ("unpack", "x, y = a"),
+    ("dot", "a.dot(b)"),
+    ("rotated", "a.rotated(0.3)"),
+    ("accumulate 8", "acc = V()\nfor v in vs: acc = acc + v"),
+    ("iadd 8", "acc = V()\nfor v in vs: acc.iadd(v)"),
+]
+
+
+def time_case(cls, stmt, number):
+    namespace = {
+        'V': cls,
+        'a': cls(3.0, 4.0),
+        'b': cls(-1.5, 2.0),
+        't': (1.0, 2.0),
+        'vs': [cls(i, -i) for i in range(8)],
+    }
+    best = min(timeit.repeat(stmt, globals=namespace, number=number, repeat=5))
+    return best / number
+
+
+def main(number=100000):
+    print(f"{'operation':>14} {'old ns':>8} {'new ns':>8} {'speedup':>8}")
+    old_accumulate = None
+    for name, stmt in CASES:
+        new = time_case(Vector2D, stmt, number)
+        if name == "iadd 8":
+            # compare against the old way of accumulating
+            old = old_accumulate
+        else:
+            old = time_case(OldVector2D, stmt, number)
+        if name == "accumulate 8":
+            old_accumulate = old
+        print(f"{name:>14} {old * 1e9:>8.0f} {new * 1e9:>8.0f} {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
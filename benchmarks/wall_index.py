@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark wall lookups: the old dict-of-lists spatial hash vs WallIndex.
+
+Builds the walls for every combination of background tiles, throws
+random circles at them, and reports how many walls each lookup scans
+and returns as candidates, and how long a lookup plus the narrowphase takes,
+for a range of WallIndex cell sizes.  Times are the best of REPEATS
+rounds, with every index timed in each round.
+
+Run from the top of the repo:
+
+    python3 -m benchmarks.wall_index
+"""
+import itertools
+import math
+import random
+import time
+
+from ascend.wall import Wall, level_tiles, load_wall_polygons, boundary_wall_polygons
+from ascend.wallindex import WallIndex
+
+from pygame import Rect
+
+
+WIDTH = 1024
+HEIGHT = 768
+RADII = (2, 8, 10, 15, 20, 25, 30)
+CELL_SIZES = (16, 32, 48, 64, 96, 128, 256)
+QUERIES = 2000
+REPEATS = 5
+
+
+def level_walls(left, mid, right):
+    walls = []
+    for fname, pos, rotation in level_tiles(left, mid, right):
+        for poly in load_wall_polygons(fname, pos, rotation):
+            walls.append(Wall(None, poly, visible=False))
+    for points in boundary_wall_polygons(WIDTH, HEIGHT):
+        walls.append(Wall(None, points, visible=False))
+    return walls
+
+
+class OldHash:
+    """The spatial hash Level used before WallIndex."""
+    HASH_SCALE = 30
+
+    def __init__(self, walls):
+        self.queries = self.candidates = self.scanned = 0
+        self.wall_hash = {}
+        for w in walls:
+            r = Rect(
+                *w.upper_left - (50, 50),
+                *w.lower_right - w.upper_left + (100, 100)
+            )
+            for k in self.hash_coords(r):
+                self.wall_hash.setdefault(k, []).append(w)
+
+    def hash_coords(self, rect):
+        s = self.HASH_SCALE
+        l = rect.left // s
+        r = rect.right // s + 1
+        t = rect.top // s
+        b = rect.bottom // s + 1
+        return itertools.product(range(l, r), range(t, b))
+
+    def query(self, pos, radius):
+        self.queries += 1
+        w = radius * 2
+        r = Rect(*pos, w, w)
+        hit_walls = set()
+        for k in self.hash_coords(r):
+            ws = self.wall_hash.get(k)
+            if ws:
+                hit_walls.update(ws)
+        self.candidates += len(hit_walls)
+        self.scanned += len(hit_walls)
+        return hit_walls
+
+
+class Probe:
+    def __init__(self, pos, radius):
+        self.pos = pos
+        self.radius = radius
+
+
+def lookup(index, probes):
+    for probe in probes:
+        index.query(probe.pos, probe.radius)
+
+
+def collide(index, probes):
+    for probe in probes:
+        for wall in index.query(probe.pos, probe.radius):
+            wall.collide_with_entity(probe)
+
+
+def main():
+    rng = random.Random(0)
+    layouts = list(itertools.product((1, 2, 3), (1, 2, 3), (1, 2, 3)))
+    levels = [level_walls(*layout) for layout in layouts]
+    probes = [
+        Probe((rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)), rng.choice(RADII))
+        for _ in range(QUERIES)
+        ]
+
+    indexes = {"old hash (30px)": OldHash}
+    for cell_size in CELL_SIZES:
+        indexes[f"WallIndex {cell_size}"] = lambda walls, cell_size=cell_size: WallIndex(walls, cell_size)
+
+    # name -> [scanned, candidates, lookup, lookup + collide], summed over levels
+    totals = {name: [0, 0, 0, 0] for name in indexes}
+    perf_counter = time.perf_counter
+    for walls in levels:
+        built = {name: make_index(walls) for name, make_index in indexes.items()}
+        for name, index in built.items():
+            lookup(index, probes)
+            totals[name][0] += index.scanned / index.queries
+            totals[name][1] += index.candidates / index.queries
+
+        # Time the indexes in turn, round after round, and keep each
+        # one's best: the machine speeding up or slowing down over
+        # the run then hits them all alike.
+        best = {name: [math.inf, math.inf] for name in built}
+        for _ in range(REPEATS):
+            for name, index in built.items():
+                for i, fn in enumerate((lookup, collide)):
+                    start = perf_counter()
+                    fn(index, probes)
+                    best[name][i] = min(best[name][i], perf_counter() - start)
+        for name, times in best.items():
+            totals[name][2] += times[0] / len(probes)
+            totals[name][3] += times[1] / len(probes)
+
+    print(f"{len(levels)} layouts, {QUERIES} queries each, best of {REPEATS}")
+    print(f"{'index':>16} {'scanned':>8} {'candidates':>11} {'lookup us':>10} {'+collide us':>12}")
+    for name, total in totals.items():
+        scanned, candidates, lookup_time, total_time = (t / len(levels) for t in total)
+        marker = "  <- default" if name == f"WallIndex {WallIndex.CELL_SIZE}" else ""
+        print(f"{name:>16} {scanned:>8.2f} {candidates:>11.2f} {lookup_time * 1e6:>10.2f} {total_time * 1e6:>12.2f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ print("[INFO] Initializing runtime...")
 
 from ascend.settings import load_settings
 import pygame
-from wasabi2d import event, run
+from ascend.engine import HEADLESS, event, run
 
 from ascend.sound import init_sound
 from ascend.game import Game
@@ -46,7 +46,8 @@ def on_key_down(key, mod):
 # +----------------------(1024, 768)
 
 settings = load_settings()
-init_sound(settings)
+if not HEADLESS:
+    init_sound(settings)
 init_controls(settings)
 
 game = Game(settings, "larry")